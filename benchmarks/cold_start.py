@@ -0,0 +1,59 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+Cold-start time of duply_notify for every notification backend: wall time of
+a full bin/duply_notify run replaying an empty log.
+
+Usage: python3 -m benchmarks.cold_start [--repeat N]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from argparse import ArgumentParser
+
+from duplynotify.Backends import BACKENDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(backend, log_file, repeat):
+    cmd = [sys.executable, os.path.join(ROOT, 'bin', 'duply_notify'), '-b', backend, '--replay-log', log_file]
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                              stdin=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        if b'Error' in proc.stderr:
+            return None, proc.stderr.decode(errors='replace').strip().splitlines()[0]
+        times.append(elapsed)
+    return times, None
+
+
+def main():
+    parser = ArgumentParser(description='duply_notify cold-start benchmark')
+    parser.add_argument('--repeat', type=int, default=10, help='runs per backend (default: 10)')
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix='.log') as log_file:
+        print('%-12s %10s %10s %10s' % ('backend', 'median ms', 'min ms', 'max ms'))
+        for backend in sorted(BACKENDS):
+            times, error = measure(backend, log_file.name, args.repeat)
+            if times is None:
+                print('%-12s unavailable: %s' % (backend, error))
+                continue
+            print('%-12s %10.1f %10.1f %10.1f' % (backend, statistics.median(times) * 1000,
+                                                  min(times) * 1000, max(times) * 1000))
+
+
+if __name__ == "__main__":
+    main()
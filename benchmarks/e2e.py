@@ -0,0 +1,85 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+End-to-end benchmark: feeds a synthetic log through DuplyRunner talking to a
+fake JobViewServer on a private session bus and reports parse throughput,
+DBus calls per second and peak memory.
+
+Usage: python3 -m benchmarks.e2e [--files N] [--volumes N] [--no-dbus]
+"""
+import io
+import os
+import resource
+import time
+
+from argparse import ArgumentParser
+
+from duplynotify import globals
+from duplynotify.DuplyRunner import DuplyRunner
+from benchmarks import loggen
+
+
+def run_runner(data):
+    runner = DuplyRunner([], 'bench', 'ark')
+    runner.check_setup_job()
+
+    start = time.perf_counter()
+    runner.process_reader(io.BytesIO(data))
+    runner.cleanup_job()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = ArgumentParser(description='duply_notify end-to-end benchmark')
+    parser.add_argument('--files', type=int, default=200000, help='changed files in scan phase (default: 200000)')
+    parser.add_argument('--volumes', type=int, default=20, help='volumes to write/upload (default: 20)')
+    parser.add_argument('--update-rate', type=float, default=globals.update_rate,
+                        help='notification updates per second (default: %s)' % globals.update_rate)
+    parser.add_argument('--dbus-async', action='store_true', help='use async JobViewClient calls')
+    parser.add_argument('--no-dbus', dest='use_dbus', action='store_false',
+                        help='run against the null backend instead of the fake JobViewServer')
+    args = parser.parse_args()
+
+    globals.update_rate = args.update_rate
+    globals.dbus_async = args.dbus_async
+    globals.notification_backend = 'kde' if args.use_dbus else 'null'
+
+    data = b'\n'.join(loggen.iter_lines(args.files, args.volumes)) + b'\n'
+    line_count = data.count(b'\n')
+
+    bus_proc = server_proc = None
+    counts = {}
+    try:
+        if args.use_dbus:
+            from benchmarks import fake_jobview
+            bus_proc, address = fake_jobview.start_private_bus()
+            server_proc = fake_jobview.spawn_server(address)
+            os.environ['DBUS_SESSION_BUS_ADDRESS'] = address
+
+        elapsed = run_runner(data)
+
+        if args.use_dbus:
+            counts = fake_jobview.get_call_counts(address)
+    finally:
+        for proc in (server_proc, bus_proc):
+            if proc:
+                proc.kill()
+                proc.wait()
+
+    calls = sum(counts.values())
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print('lines:           %d (%d bytes)' % (line_count, len(data)))
+    print('elapsed:         %12.3f s' % elapsed)
+    print('parse:           %12.0f lines/s' % (line_count / elapsed))
+    print('dbus calls:      %12d' % calls)
+    print('dbus calls/s:    %12.1f' % (calls / elapsed))
+    for name in sorted(counts):
+        print('  %-24s %8d' % (name, counts[name]))
+    print('peak rss:        %12.1f MB' % (peak_kb / 1024.0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+Stand-in for org.kde.JobViewServer on a private session bus.
+
+Usage: python3 -m benchmarks.fake_jobview   (prints bus address, runs until killed)
+"""
+import os
+import subprocess
+import sys
+
+import dbus
+import dbus.service
+
+BUS_NAME = 'org.kde.JobViewServer'
+STATS_IFACE = 'org.duplynotify.Bench'
+
+
+def start_private_bus():
+    """Starts private dbus-daemon. Returns (Popen, address)."""
+    proc = subprocess.Popen(['dbus-daemon', '--session', '--nofork', '--print-address=1'],
+                            stdout=subprocess.PIPE, stdin=subprocess.DEVNULL)
+    address = proc.stdout.readline().decode().strip()
+    if not address:
+        proc.kill()
+        raise RuntimeError('dbus-daemon did not report bus address')
+    return proc, address
+
+
+class FakeJobView(dbus.service.Object):
+    def __init__(self, server, path):
+        dbus.service.Object.__init__(self, server.connection, path)
+        self.server = server
+
+    def count(self, name):
+        self.server.calls[name] = self.server.calls.get(name, 0) + 1
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='s')
+    def terminate(self, msg):
+        self.count('terminate')
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='i')
+    def clearDescriptionField(self, number):
+        self.count('clearDescriptionField')
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='uss', out_signature='b')
+    def setDescriptionField(self, number, name, value):
+        self.count('setDescriptionField')
+        return True
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='s')
+    def setDestUrl(self, url):
+        self.count('setDestUrl')
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='u')
+    def setError(self, code):
+        self.count('setError')
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='s')
+    def setInfoMessage(self, msg):
+        self.count('setInfoMessage')
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='i')
+    def setPercent(self, percent):
+        self.count('setPercent')
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='ts')
+    def setProcessedAmount(self, amount, unit):
+        self.count('setProcessedAmount')
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='t')
+    def setSpeed(self, speed):
+        self.count('setSpeed')
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='b')
+    def setSuspended(self, suspended):
+        self.count('setSuspended')
+
+    @dbus.service.method('org.kde.JobViewV2', in_signature='ts')
+    def setTotalAmount(self, amount, unit):
+        self.count('setTotalAmount')
+
+
+class FakeJobViewServer(dbus.service.Object):
+    def __init__(self, connection):
+        dbus.service.Object.__init__(self, connection, '/JobViewServer')
+        self.calls = {}
+        self.views = []
+
+    @dbus.service.method(BUS_NAME, in_signature='ssi', out_signature='o')
+    def requestView(self, app_name, app_icon, capabilities):
+        path = '/JobViewServer/JobView_%d' % (len(self.views) + 1)
+        self.views.append(FakeJobView(self, path))
+        return path
+
+    @dbus.service.method(STATS_IFACE, out_signature='a{su}')
+    def GetCallCounts(self):
+        return self.calls
+
+    @dbus.service.method(STATS_IFACE)
+    def ResetCallCounts(self):
+        self.calls = {}
+
+
+def serve(address):
+    from dbus.mainloop.glib import DBusGMainLoop
+    from gi.repository import GLib
+
+    DBusGMainLoop(set_as_default=True)
+    bus = dbus.bus.BusConnection(address)
+    # both must stay referenced while the loop runs
+    bus_name = dbus.service.BusName(BUS_NAME, bus)
+    server = FakeJobViewServer(bus)
+    print(address)
+    sys.stdout.flush()
+    GLib.MainLoop().run()
+    del bus_name, server
+
+
+def spawn_server(address):
+    """Runs fake server in child process, waits until it owns the bus name."""
+    proc = subprocess.Popen([sys.executable, '-m', 'benchmarks.fake_jobview', '--address', address],
+                            stdout=subprocess.PIPE, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    proc.stdout.readline()
+    return proc
+
+
+def get_call_counts(address):
+    bus = dbus.bus.BusConnection(address)
+    stats = dbus.Interface(bus.get_object(BUS_NAME, '/JobViewServer'), STATS_IFACE)
+    res = dict((str(k), int(v)) for k, v in stats.GetCallCounts().items())
+    bus.close()
+    return res
+
+
+def main():
+    if len(sys.argv) == 3 and sys.argv[1] == '--address':
+        serve(sys.argv[2])
+        return
+
+    bus_proc, address = start_private_bus()
+    try:
+        serve(address)
+    finally:
+        bus_proc.kill()
+
+
+if __name__ == "__main__":
+    main()
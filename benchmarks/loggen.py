@@ -0,0 +1,116 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+Synthetic duplicity --log-fd stream generator.
+
+Usage: python3 -m benchmarks.loggen [--files N] [--volumes N] [--timestamps] [-o FILE]
+"""
+import sys
+
+from argparse import ArgumentParser
+
+VOLUME_SIZE = 200 * 1024 * 1024
+
+
+def record(header, *messages):
+    res = [header]
+    res.extend(b'. ' + msg for msg in messages)
+    res.append(b'')
+    return res
+
+
+def iter_lines(files=100000, volumes=10, progress_every=50, par2=True, backup_name=b'bench',
+               speed=2 * 1024 * 1024):
+    """
+    Yields log lines (bytes, no newline) of an incremental backup: startup,
+    scan flood of INFO 4/5/6 with NOTICE 16 progress, then gpg/par2/upload of
+    every volume.
+    """
+    for line in record(b'NOTICE 1', b'Using backup name: ' + backup_name):
+        yield line
+    for line in record(b'INFO 1', b'Main action: inc'):
+        yield line
+    for line in record(b'NOTICE 1', b'Synchronizing remote metadata to local cache...'):
+        yield line
+    for line in record(b'INFO 1', b'Copying duplicity-full-signatures.sigtar.gpg to local cache.'):
+        yield line
+    for line in record(b'NOTICE 1', b'Collection Status', b'-----------------'):
+        yield line
+    for line in record(b'INFO 1', b'AsyncScheduler: instantiating at concurrency 0'):
+        yield line
+
+    total_bytes = volumes * VOLUME_SIZE
+    files_per_volume = max(1, files // max(1, volumes))
+    elapsed = 0
+    volume = 0
+
+    for idx in range(files):
+        code = (b'4', b'5', b'6')[idx % 3]
+        action = (b'M', b'A', b'D')[idx % 3]
+        path = b'home/user/src/project%d/module%d/file%d.dat' % (idx % 7, idx % 97, idx)
+        for line in record(b"INFO " + code + b" '" + path + b"'", action + b' ' + path):
+            yield line
+
+        if idx % progress_every == 0:
+            changed_bytes = total_bytes * (idx + 1) // files
+            elapsed += 1
+            progress = changed_bytes * 100 // total_bytes if total_bytes else 0
+            eta = (total_bytes - changed_bytes) // speed
+            stalled = 1 if idx % (progress_every * 40) == 0 else 0
+            header = b'NOTICE 16 %d %d %d %d %d %d' % (changed_bytes, elapsed, progress, eta, speed, stalled)
+            for line in record(header, b'%d%% ETA %ds' % (progress, eta)):
+                yield line
+
+        if (idx + 1) % files_per_volume == 0 and volume < volumes:
+            volume += 1
+            vol_name = b'duplicity-inc.20261018T000000Z.to.20261018T010000Z.vol%d.difftar.gpg' % volume
+            for line in record(b'INFO 1', b'Writing ' + vol_name):
+                yield line
+            if par2:
+                for line in record(b'INFO 1', b'Create Par2 recovery files'):
+                    yield line
+            for line in record(b"INFO 11 '" + vol_name + b"'", b'Uploading ' + vol_name):
+                yield line
+            for line in record(b"INFO 13 '" + vol_name + b"' %d" % VOLUME_SIZE, b'Uploaded ' + vol_name):
+                yield line
+
+
+def iter_capture(lines, start_time=1792000000.0, lines_per_second=2000.0):
+    """Wraps lines into --debug-log capture format."""
+    step = 1.0 / lines_per_second
+    ts = start_time
+    for line in lines:
+        yield b'[%10.6f] %s' % (ts, line)
+        ts += step
+
+
+def main():
+    parser = ArgumentParser(description='generate synthetic duplicity --log-fd stream')
+    parser.add_argument('--files', type=int, default=100000, help='changed files in scan phase (default: 100000)')
+    parser.add_argument('--volumes', type=int, default=10, help='volumes to write/upload (default: 10)')
+    parser.add_argument('--progress-every', type=int, default=50,
+                        help='NOTICE 16 record every N files (default: 50)')
+    parser.add_argument('--no-par2', dest='par2', action='store_false', help="don't emit par2 records")
+    parser.add_argument('--timestamps', action='store_true', help='write --debug-log capture format')
+    parser.add_argument('--rate', type=float, default=2000.0,
+                        help='lines per second in capture timestamps (default: 2000)')
+    parser.add_argument('-o', '--output', action='store', default=None, help='output file (default: stdout)')
+    args = parser.parse_args()
+
+    lines = iter_lines(args.files, args.volumes, args.progress_every, args.par2)
+    if args.timestamps:
+        lines = iter_capture(lines, lines_per_second=args.rate)
+
+    out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+    try:
+        for line in lines:
+            out.write(line + b'\n')
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
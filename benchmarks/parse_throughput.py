@@ -0,0 +1,92 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+Compares EventParser.parse against the old sequential regex matcher.
+
+Usage: python3 -m benchmarks.parse_throughput [--files N] [--repeat N]
+"""
+import re
+import time
+
+from argparse import ArgumentParser
+
+from duplynotify.Events import EventParser
+from benchmarks import loggen
+
+
+class LegacyMatcher(object):
+    """Sequential matcher used by DuplyRunner before code-keyed dispatch."""
+
+    def __init__(self):
+        self.matched = 0
+        self.RE_PATTERNS = [
+            re.compile(r'Using backup name: (.*)$'),
+            re.compile(r'Main action: (.*)$'),
+            'Synchronizing remote metadata to local cache...',
+            re.compile(r'Copying (.*) to local cache.'),
+            'Collection Status',
+            re.compile(r'AsyncScheduler: instantiating at concurrency.*$'),
+            re.compile(r'Writing (.*\.gpg)$'),
+            'Create Par2 recovery files',
+        ]
+        self.RE_HEAD_PATTERNS = [
+            re.compile(r'NOTICE 16 (?P<changed_bytes>\d+) (?P<elapsed>\d+) '
+                       r'(?P<progress>\d+) (?P<eta>\d+) (?P<speed>\d+) (?P<stalled>\d+)'),
+            re.compile(r'INFO (4|5|6) \'(?P<file_name>.*)\''),
+            re.compile(r'INFO (11|12)'),
+            re.compile(r'INFO (13|14)'),
+        ]
+
+    def parse_line(self, line):
+        line = line.decode('utf-8', 'replace').strip()
+        if line.startswith('. '):
+            line = line[2:]
+            patterns = self.RE_PATTERNS
+        else:
+            patterns = self.RE_HEAD_PATTERNS
+
+        for regex in patterns:
+            if isinstance(regex, str):
+                m = regex == line
+            else:
+                m = regex.match(line)
+            if m:
+                self.matched += 1
+                return True
+        return False
+
+
+def measure(parse, lines, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            parse(line)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return len(lines) / best
+
+
+def main():
+    parser = ArgumentParser(description='duply_notify parse throughput benchmark')
+    parser.add_argument('--files', type=int, default=150000,
+                        help='changed files in generated log (default: 150000)')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per matcher, best is reported (default: 3)')
+    args = parser.parse_args()
+
+    lines = list(loggen.iter_lines(args.files, volumes=10))
+
+    legacy = measure(LegacyMatcher().parse_line, lines, args.repeat)
+    dispatch = measure(EventParser().parse, lines, args.repeat)
+
+    print('lines:           %d' % len(lines))
+    print('legacy matcher:  %12.0f lines/s' % legacy)
+    print('event parser:    %12.0f lines/s' % dispatch)
+    print('speedup:         %12.2fx' % (dispatch / legacy))
+
+
+if __name__ == "__main__":
+    main()
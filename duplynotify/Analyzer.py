@@ -0,0 +1,168 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import json
+import os
+import sys
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+
+from duplynotify import globals
+from duplynotify.Capture import is_capture, open_capture, segment_base
+from duplynotify.DuplyRunner import DuplyRunner
+from duplynotify.PhaseTimeline import PhaseTimeline
+from duplynotify.RunMetrics import RunMetrics
+
+
+class CaptureClock(object):
+    """Clock that follows capture timestamps instead of wall time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def find_captures(paths):
+    """
+    Files given explicitly, plus captures (by content) found in directories.
+    capture.log.1, capture.log.2.gz ... are read together with capture.log, so
+    they are skipped when capture.log is there.
+    """
+    res = []
+    for path in paths:
+        if os.path.isfile(path):
+            res.append(path)
+            continue
+        for dir_name, _, file_names in os.walk(path):
+            for file_name in sorted(file_names):
+                full_name = os.path.join(dir_name, file_name)
+                if segment_base(full_name) is None and is_capture(full_name):
+                    res.append(full_name)
+    return res
+
+
+def analyze_capture(file_name):
+    """Replays one capture through DuplyRunner at full speed with the null backend."""
+    globals.notification_backend = 'null'
+    globals.update_rate = 0
+    globals.verbose = False
+
+    clock = CaptureClock()
+    runner = DuplyRunner([], 'analyze', None)
+    runner.check_setup_job()
+
+    first_time = None
+    lines = 0
+    reader = open_capture(file_name)
+    try:
+        while True:
+            record = reader.read_record()
+            if record is None:
+                break
+            lines += 1
+            ts, line = record
+            if ts is not None:
+                clock.now = ts
+                if first_time is None:
+                    first_time = clock.now
+                    runner.timeline = PhaseTimeline(clock)
+                    runner.metrics = RunMetrics(clock)
+            runner.handle_line(line)
+    except Exception as e:
+        return {'file': file_name, 'error': str(e)}
+    finally:
+        reader.close()
+
+    runner.timeline.finish()
+    throughput = runner.throughput
+    return {
+        'file': file_name,
+        'backup': runner.backup_name or 'unknown',
+        'start': first_time,
+        'lines': lines,
+        'duration': runner.timeline.duration(),
+        'changed_bytes': throughput.changed_bytes,
+        'avg_speed': throughput.average_speed(),
+        'peak_speed': throughput.peak_speed,
+        'stall_time': throughput.total_stall_time(),
+        'volumes': runner.metrics.volumes,
+        'bottleneck': runner.timeline.bottleneck(),
+        'phases': runner.timeline.phase_totals(),
+    }
+
+
+def aggregate(results):
+    res = {}
+    for run in results:
+        if 'error' in run:
+            continue
+        agg = res.setdefault(run['backup'], {'runs': 0, 'duration': 0.0, 'changed_bytes': 0, 'stall_time': 0,
+                                             'volumes': 0})
+        agg['runs'] += 1
+        agg['duration'] += run['duration']
+        agg['changed_bytes'] += run['changed_bytes']
+        agg['stall_time'] += run['stall_time']
+        agg['volumes'] += run['volumes']
+    for agg in res.values():
+        agg['throughput'] = agg['changed_bytes'] / agg['duration'] if agg['duration'] else 0.0
+    return res
+
+
+def print_table(results, per_backup):
+    fmt = '%-40s %-16s %10s %10s %10s %8s %8s %-10s'
+    print(fmt % ('run', 'backup', 'duration', 'MB', 'KB/s', 'stall s', 'volumes', 'bound by'))
+    for run in results:
+        if 'error' in run:
+            print('%-40s error: %s' % (os.path.basename(run['file']), run['error']))
+            continue
+        print(fmt % (os.path.basename(run['file'])[:40], run['backup'][:16], '%.0f' % run['duration'],
+                     '%.1f' % (run['changed_bytes'] / 1048576.0),
+                     '%.1f' % (run['changed_bytes'] / run['duration'] / 1024.0 if run['duration'] else 0),
+                     run['stall_time'], run['volumes'], run['bottleneck'] or ''))
+    print()
+    fmt = '%-16s %6s %12s %10s %10s %10s %8s'
+    print(fmt % ('backup', 'runs', 'duration', 'MB', 'KB/s', 'stall s', 'volumes'))
+    for name in sorted(per_backup):
+        agg = per_backup[name]
+        print(fmt % (name[:16], agg['runs'], '%.0f' % agg['duration'], '%.1f' % (agg['changed_bytes'] / 1048576.0),
+                     '%.1f' % (agg['throughput'] / 1024.0), agg['stall_time'], agg['volumes']))
+
+
+def main(argv):
+    parser = ArgumentParser(prog='duply_notify analyze',
+                            description='analyze captured --debug-log files at full speed')
+    parser.add_argument('paths', nargs='+', help='capture files or directories with captures')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='worker processes (default: number of CPUs)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args(argv)
+
+    files = find_captures(args.paths)
+    if not files:
+        sys.stderr.write('no captures found\n')
+        return 1
+
+    # biggest first keeps workers busy until the end
+    files.sort(key=lambda x: -os.path.getsize(x))
+    if args.jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(analyze_capture, files))
+    else:
+        results = [analyze_capture(x) for x in files]
+
+    results.sort(key=lambda x: (x.get('backup', ''), x.get('start') or 0, x['file']))
+    per_backup = aggregate(results)
+
+    if args.json:
+        json.dump({'runs': results, 'backups': per_backup}, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        print_table(results, per_backup)
+    return 0
@@ -0,0 +1,40 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import importlib
+
+# backend name -> (module, class). Modules are imported only when selected,
+# so e.g. dbus is never loaded for the terminal or null backend.
+BACKENDS = {
+    'kde': ('duplynotify.JobViewClient', 'JobViewClient'),
+    'freedesktop': ('duplynotify.NotifyClient', 'NotifyClient'),
+    'terminal': ('duplynotify.TerminalClient', 'TerminalClient'),
+    'null': ('duplynotify.NullClient', 'NullClient'),
+}
+
+DEFAULT_BACKEND = 'kde'
+
+
+def get_backend_class(name):
+    if name not in BACKENDS:
+        raise ValueError('unknown notification backend: %s' % name)
+    module_name, class_name = BACKENDS[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_backend(name, stats=None):
+    """
+    Every backend implements JobViewClient interface (start, is_ready, stop,
+    terminate, drain, commit, set_*), ERRORS (exceptions worth surviving)
+    and USES_SESSION_BUS.
+    """
+    from duplynotify import globals
+
+    cls = get_backend_class(name)
+    if name == 'kde':
+        return cls(globals.dbus_async, globals.dbus_max_in_flight, stats)
+    return cls(stats)
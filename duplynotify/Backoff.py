@@ -0,0 +1,32 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import time
+
+
+class Backoff(object):
+    """Exponential delay between reconnect attempts."""
+
+    def __init__(self, initial=1.0, maximum=60.0, factor=2.0, clock=time.monotonic):
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.clock = clock
+        self.delay = 0.0
+        self.next_try = 0.0
+
+    def ready(self):
+        return self.clock() >= self.next_try
+
+    def failed(self):
+        self.delay = min(self.maximum, self.delay * self.factor) if self.delay else self.initial
+        self.next_try = self.clock() + self.delay
+        return self.delay
+
+    def succeeded(self):
+        self.delay = 0.0
+        self.next_try = 0.0
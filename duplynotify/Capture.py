@@ -0,0 +1,308 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import collections
+import gzip
+import lzma
+import os
+import re
+import threading
+import time
+
+COMPRESSORS = {
+    'gzip': ('.gz', gzip.open),
+    'xz': ('.xz', lzma.open),
+}
+# cheapest settings, used once compressor can't keep up with the log
+FAST_COMPRESSORS = {
+    'gzip': lambda name, mode: gzip.open(name, mode, compresslevel=1),
+    'xz': lambda name, mode: lzma.open(name, mode, preset=0),
+}
+
+MAGIC = [
+    (b'\x1f\x8b', gzip.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+]
+
+# first line of text capture (after decompression)
+TEXT_CAPTURE_RE = re.compile(rb'\[\d+\.\d+\] ')
+
+# writer thread wakes up at least this often
+FLUSH_INTERVAL = 0.5
+# ... or as soon as this many lines are queued
+FLUSH_LINES = 8192
+# queued bytes (with per-line overhead): over FAST_PENDING the next segment uses the fast
+# compressor, over MAX_PENDING lines are dropped
+FAST_PENDING = 4 << 20
+MAX_PENDING = 16 << 20
+# memory of queued (timestamp, line) beyond the line itself, roughly
+ENTRY_OVERHEAD = 100
+# close() gives up writing what is still queued after this many seconds
+CLOSE_TIMEOUT = 5.0
+
+
+def guess_compression(file_name):
+    for name, (ext, _) in COMPRESSORS.items():
+        if file_name.endswith(ext):
+            return name
+    return None
+
+
+def segment_name(file_name, index):
+    """capture.log.gz -> capture.log.1.gz for index 1. Index 0 is the file itself."""
+    if index == 0:
+        return file_name
+    compression = guess_compression(file_name)
+    if compression:
+        ext = COMPRESSORS[compression][0]
+        return '%s.%d%s' % (file_name[:-len(ext)], index, ext)
+    return '%s.%d' % (file_name, index)
+
+
+class CaptureWriter(object):
+    """
+    Writes '[timestamp] line' capture of duplicity log on a background thread.
+    Optionally compresses it (gzip/xz) and starts a new segment after
+    max_size bytes of (uncompressed) log.
+
+    Memory is bounded: when compression falls behind the log, the rest goes
+    to a new segment compressed with the cheapest preset, and if even that
+    isn't enough, lines are dropped (counted in dropped).
+    """
+
+    def __init__(self, file_name, compression=None, max_size=0):
+        self.file_name = file_name
+        self.compression = compression if compression is not None else guess_compression(file_name)
+        self.max_size = max_size
+
+        self.segment = 0
+        self.written = 0
+        self.fast = False
+        self.f_obj = self.open_segment()
+
+        self.queue = collections.deque()
+        # pending bytes are queued - taken; each counter has a single writer thread
+        self.queued_bytes = 0
+        self.taken_bytes = 0
+        self.dropped = 0
+        self.discard = False
+        self.wakeup = threading.Event()
+        self.closing = False
+        self.error = None
+        self.thread = threading.Thread(target=self.write_loop, name='CaptureWriter', daemon=True)
+        self.thread.start()
+
+    def open_segment(self):
+        name = segment_name(self.file_name, self.segment)
+        if self.compression:
+            if self.fast:
+                return FAST_COMPRESSORS[self.compression](name, 'wb')
+            return COMPRESSORS[self.compression][1](name, 'wb')
+        return open(name, 'wb', buffering=1 << 20)
+
+    def write(self, line):
+        if self.error is not None:
+            return
+        if self.queued_bytes - self.taken_bytes > MAX_PENDING:
+            self.dropped += 1
+            return
+        self.queued_bytes += len(line) + ENTRY_OVERHEAD
+        self.queue.append((time.time(), line))
+        if len(self.queue) >= FLUSH_LINES:
+            self.wakeup.set()
+
+    def mark_phase(self, phase):
+        """Phase marks are queued as str (lines are bytes). Never dropped: replay seeks by them."""
+        self.queued_bytes += len(phase) + ENTRY_OVERHEAD
+        self.queue.append((time.time(), phase))
+
+    def write_loop(self):
+        while True:
+            self.wakeup.wait(FLUSH_INTERVAL)
+            self.wakeup.clear()
+            closing = self.closing
+            try:
+                self.write_pending()
+            except Exception as e:
+                # keep draining so the reader never piles up memory
+                self.error = e
+                self.queue.clear()
+            if closing:
+                break
+
+    def write_pending(self):
+        queue = self.queue
+        chunk = []
+        encode = self.encode
+        while queue:
+            if self.discard:
+                self.dropped += len(queue)
+                queue.clear()
+                break
+            ts, line = queue.popleft()
+            self.taken_bytes += len(line) + ENTRY_OVERHEAD
+            data = encode(ts, line)
+            if data is not None:
+                chunk.append(data)
+            if len(chunk) >= FLUSH_LINES:
+                self.write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.write_chunk(chunk)
+
+    @staticmethod
+    def encode(ts, line):
+        if line.__class__ is str:
+            return None
+        return b'[%10.6f] %s\n' % (ts, line)
+
+    def write_chunk(self, chunk):
+        data = b''.join(chunk)
+        if self.error is not None:
+            return
+        if self.compression and not self.fast and self.queued_bytes - self.taken_bytes > FAST_PENDING:
+            self.fast = True
+            self.next_segment()
+        self.f_obj.write(data)
+        self.written += len(data)
+        if self.max_size and self.written >= self.max_size:
+            self.next_segment()
+
+    def next_segment(self):
+        self.f_obj.close()
+        self.segment += 1
+        self.written = 0
+        self.f_obj = self.open_segment()
+
+    def close(self):
+        self.closing = True
+        self.wakeup.set()
+        self.thread.join(CLOSE_TIMEOUT)
+        if self.thread.is_alive():
+            # what is still queued is lost; current chunk is finished
+            self.discard = True
+            self.thread.join()
+        self.f_obj.close()
+        if self.error is not None:
+            print("CaptureWriter: %s" % self.error)
+        if self.dropped:
+            print("CaptureWriter: %d lines dropped (log came faster than it could be written)" % self.dropped)
+
+
+def open_segment_file(file_name):
+    with open(file_name, 'rb') as f:
+        head = f.read(6)
+    for magic, opener in MAGIC:
+        if head.startswith(magic):
+            return opener(file_name, 'rb')
+    return open(file_name, 'rb')
+
+
+def is_capture(file_name):
+    """Compact capture or (possibly compressed) text capture, by content."""
+    from duplynotify import CompactCapture
+
+    try:
+        if CompactCapture.is_compact(file_name):
+            return True
+        with open_segment_file(file_name) as f:
+            return TEXT_CAPTURE_RE.match(f.read(64)) is not None
+    except (OSError, EOFError, lzma.LZMAError):
+        return False
+
+
+def segment_base(file_name):
+    """capture.log.2.gz -> capture.log.gz if that file exists (so this is its segment), else None."""
+    match = re.match(r'^(.*)\.\d+(\.gz|\.xz)?$', file_name)
+    if match is None:
+        return None
+    base = match.group(1) + (match.group(2) or '')
+    return base if os.path.exists(base) else None
+
+
+class CaptureReader(object):
+    """Reads (possibly compressed and rotated) capture as one binary stream."""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.segment = 0
+        self.f_obj = open_segment_file(file_name)
+
+    def read_record(self):
+        """Returns (timestamp or None, line without newline), None at EOF."""
+        line = self.readline()
+        if not line:
+            return None
+        line = line.rstrip(b'\n')
+        if line.startswith(b'['):
+            idx = line.find(b'] ')
+            if idx > 0:
+                try:
+                    return float(line[1:idx]), line[idx + 2:]
+                except ValueError:
+                    pass
+        return None, line
+
+    def readline(self):
+        while True:
+            res = self.f_obj.readline()
+            if res:
+                return res
+            name = segment_name(self.file_name, self.segment + 1)
+            if not os.path.exists(name):
+                return res
+            self.f_obj.close()
+            self.segment += 1
+            self.f_obj = open_segment_file(name)
+
+    def close(self):
+        self.f_obj.close()
+
+
+def open_capture(file_name, start_time=None, start_phase=None):
+    """
+    Opens text or compact capture. start_time (seconds from capture start) and
+    start_phase skip ahead; phases are only known to compact captures.
+    """
+    from duplynotify import CompactCapture
+
+    if CompactCapture.is_compact(file_name):
+        return CompactCapture.CompactReader(file_name, start_time, start_phase)
+
+    if start_phase is not None:
+        raise ValueError('starting from phase needs compact capture (--debug-log-format compact)')
+    reader = CaptureReader(file_name)
+    if start_time is not None:
+        reader = SkippingReader(reader, start_time)
+    return reader
+
+
+class SkippingReader(object):
+    """Text capture from given offset: scans from the beginning."""
+
+    def __init__(self, reader, start_time):
+        self.reader = reader
+        self.start_time = start_time
+        self.first_time = None
+        self.skipping = True
+
+    def read_record(self):
+        while True:
+            res = self.reader.read_record()
+            if res is None or not self.skipping:
+                return res
+            ts = res[0]
+            if ts is None:
+                continue
+            if self.first_time is None:
+                self.first_time = ts
+            if ts - self.first_time >= self.start_time:
+                self.skipping = False
+                return res
+
+    def close(self):
+        self.reader.close()
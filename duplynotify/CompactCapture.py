@@ -0,0 +1,252 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+
+Compact capture format:
+
+    MAGIC, base timestamp (<d)
+    records: varint delta_us, varint code, varint length, payload
+
+Timestamps are microseconds since the previous record. Header lines are
+stored as interned 'LEVEL CODE' key (defined inline once by a DEFINE record)
+plus the rest of the line, message lines as their text without '. '. SYNC
+records carry an absolute timestamp; the sidecar index (<file>.idx, JSON)
+points at them every INDEX_INTERVAL seconds and at every phase change.
+"""
+import json
+import mmap
+import struct
+
+from duplynotify.Capture import CaptureWriter
+
+MAGIC = b'DNCAP1\n'
+BASE_STRUCT = struct.Struct('<d')
+
+CODE_EMPTY = 0
+CODE_MESSAGE = 1
+CODE_DEFINE = 3
+CODE_SYNC = 4
+FIRST_KEY_CODE = 16
+
+# seconds between time index points
+INDEX_INTERVAL = 10.0
+
+
+def is_compact(file_name):
+    with open(file_name, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def index_name(file_name):
+    return file_name + '.idx'
+
+
+def varint(value):
+    res = bytearray()
+    while value >= 0x80:
+        res.append((value & 0x7f) | 0x80)
+        value >>= 7
+    res.append(value)
+    return bytes(res)
+
+
+def line_key(line):
+    """'LEVEL CODE' part of header line (same split as EventParser.parse)."""
+    sp = line.find(b' ')
+    if sp < 0:
+        return line
+    sp2 = line.find(b' ', sp + 1)
+    return line if sp2 < 0 else line[:sp2]
+
+
+class CompactCaptureWriter(CaptureWriter):
+    """CaptureWriter producing compact format plus sidecar index. No compression/rotation."""
+
+    def __init__(self, file_name, index_interval=INDEX_INTERVAL):
+        self.index_interval = index_interval
+        self.codes = {}
+        self.offset = 0
+        self.base = None
+        self.prev_us = 0
+        self.next_index = None
+        self.last_time = None
+        self.time_points = []
+        self.phases = {}
+        CaptureWriter.__init__(self, file_name, False, 0)
+
+    def record(self, delta_us, code, payload):
+        data = varint(delta_us) + varint(code) + varint(len(payload)) + payload
+        self.offset += len(data)
+        return data
+
+    def sync(self, ts):
+        """SYNC record with absolute time; returns (offset, data)."""
+        offset = self.offset
+        self.prev_us = int(round((ts - self.base) * 1000000))
+        return offset, self.record(0, CODE_SYNC, BASE_STRUCT.pack(ts))
+
+    def encode(self, ts, line):
+        res = []
+        if self.base is None:
+            self.base = ts
+            self.offset = len(MAGIC) + BASE_STRUCT.size
+            res.append(MAGIC + BASE_STRUCT.pack(ts))
+            self.next_index = ts
+
+        if ts >= self.next_index:
+            offset, data = self.sync(ts)
+            res.append(data)
+            self.time_points.append([ts, offset])
+            self.next_index = ts + self.index_interval
+        self.last_time = ts
+
+        if line.__class__ is str:
+            offset, data = self.sync(ts)
+            res.append(data)
+            self.phases.setdefault(line, []).append([ts, offset])
+            return b''.join(res)
+
+        us = int(round((ts - self.base) * 1000000))
+        # time.time() may go backwards, deltas can't
+        delta = max(0, us - self.prev_us)
+        self.prev_us += delta
+
+        if line.startswith(b'. '):
+            res.append(self.record(delta, CODE_MESSAGE, line[2:]))
+        elif not line:
+            res.append(self.record(delta, CODE_EMPTY, b''))
+        else:
+            key = line_key(line)
+            code = self.codes.get(key)
+            if code is None:
+                code = FIRST_KEY_CODE + len(self.codes)
+                self.codes[key] = code
+                res.append(self.record(0, CODE_DEFINE, varint(code) + key))
+            res.append(self.record(delta, code, line[len(key):]))
+        return b''.join(res)
+
+    def close(self):
+        CaptureWriter.close(self)
+        index = {
+            'version': 1,
+            'base': self.base,
+            'end': self.last_time,
+            'codes': dict((str(code), key.decode('utf-8', 'replace')) for key, code in self.codes.items()),
+            'time_points': self.time_points,
+            'phases': self.phases,
+        }
+        with open(index_name(self.file_name), 'w') as f:
+            json.dump(index, f)
+
+
+class CompactReader(object):
+    """
+    mmap based reader of compact capture. Can start at a time offset (seconds
+    from capture start) or at the first occurrence of a phase.
+    """
+
+    def __init__(self, file_name, start_time=None, start_phase=None):
+        self.f_obj = open(file_name, 'rb')
+        self.data = mmap.mmap(self.f_obj.fileno(), 0, access=mmap.ACCESS_READ)
+        self.base = BASE_STRUCT.unpack_from(self.data, len(MAGIC))[0]
+        self.pos = len(MAGIC) + BASE_STRUCT.size
+        self.us = 0
+        self.codes = {}
+        self.skip_until = None
+
+        index = None
+        if start_time is not None or start_phase is not None:
+            index = self.load_index(file_name)
+
+        if start_phase is not None:
+            points = index['phases'].get(start_phase)
+            if not points:
+                raise ValueError('phase %s not found in capture (known: %s)' %
+                                 (start_phase, ', '.join(sorted(index['phases'])) or 'none'))
+            self.pos = points[0][1]
+        elif start_time is not None:
+            target = self.base + start_time
+            for ts, offset in index['time_points']:
+                if ts > target:
+                    break
+                self.pos = offset
+            self.skip_until = target
+
+    def load_index(self, file_name):
+        try:
+            with open(index_name(file_name), 'r') as f:
+                index = json.load(f)
+        except OSError as e:
+            raise ValueError("can't seek without capture index: %s" % e)
+        self.codes = dict((int(code), key.encode('utf-8')) for code, key in index['codes'].items())
+        return index
+
+    def read_varint(self):
+        data = self.data
+        pos = self.pos
+        res = 0
+        shift = 0
+        while True:
+            b = data[pos]
+            pos += 1
+            res |= (b & 0x7f) << shift
+            if b < 0x80:
+                self.pos = pos
+                return res
+            shift += 7
+
+    def read_record(self):
+        """Returns (timestamp, line), None at EOF."""
+        size = len(self.data)
+        while self.pos < size:
+            self.us += self.read_varint()
+            code = self.read_varint()
+            length = self.read_varint()
+            payload = self.data[self.pos:self.pos + length]
+            self.pos += length
+
+            if code == CODE_SYNC:
+                self.us = int(round((BASE_STRUCT.unpack(payload)[0] - self.base) * 1000000))
+                continue
+            if code == CODE_DEFINE:
+                key_code, used = self.read_varint_from(payload)
+                self.codes[key_code] = payload[used:]
+                continue
+
+            ts = self.base + self.us / 1000000.0
+            if self.skip_until is not None:
+                if ts < self.skip_until:
+                    continue
+                self.skip_until = None
+
+            if code == CODE_MESSAGE:
+                return ts, b'. ' + payload
+            if code == CODE_EMPTY:
+                return ts, b''
+            return ts, self.codes[code] + payload
+        return None
+
+    @staticmethod
+    def read_varint_from(data):
+        """Returns (value, bytes used)."""
+        res = 0
+        shift = 0
+        for idx, b in enumerate(data):
+            res |= (b & 0x7f) << shift
+            if b < 0x80:
+                return res, idx + 1
+            shift += 7
+        raise ValueError('truncated varint')
+
+    def readline(self):
+        res = self.read_record()
+        if res is None:
+            return b''
+        return b'[%10.6f] %s\n' % res
+
+    def close(self):
+        self.data.close()
+        self.f_obj.close()
@@ -12,11 +12,28 @@ duply_notify is a duplicity wrapper that shows progress in KDE notification area
 """
 import logging
 import os
+import pwd
+import stat
 
 from duplynotify import globals
 
 log = logging.getLogger(__name__)
 
+expected_var = 'DBUS_SESSION_BUS_ADDRESS'
+
+# path -> (st_mtime_ns, value); entries are reused until the file changes
+discovery_cache = {}
+
+
+def cached_by_mtime(path, loader):
+    mtime = os.stat(path).st_mtime_ns
+    entry = discovery_cache.get(path)
+    if entry is not None and entry[0] == mtime:
+        return entry[1]
+    value = loader(path)
+    discovery_cache[path] = (mtime, value)
+    return value
+
 
 def dbus_update_environment():
     if globals.dbus_env:
@@ -26,10 +43,46 @@ def dbus_update_environment():
         return dbus_read_user(globals.dbus_user)
 
 
+def dbus_runtime_bus(user_name):
+    """systemd user bus socket (/run/user/<uid>/bus), None if there is none."""
+    try:
+        uid = pwd.getpwnam(user_name).pw_uid
+        path = '/run/user/%d/bus' % uid
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            return path
+    except (KeyError, OSError):
+        pass
+    return None
+
+
+def read_machine_id(file_name):
+    with open(file_name, 'r') as f:
+        return f.readline().strip()
+
+
+def list_session_files(session_path, machine_id):
+    return [os.path.join(session_path, fn) for fn in os.listdir(session_path) if fn.startswith(machine_id)]
+
+
+def newest_first(session_files):
+    """Sorted by file mtime, newest first. Files removed meanwhile are skipped."""
+    res = []
+    for file_name in session_files:
+        try:
+            res.append((os.stat(file_name).st_mtime, file_name))
+        except OSError:
+            pass
+    return [file_name for _, file_name in sorted(res, reverse=True)]
+
+
 def dbus_read_user(user_name):
+    bus_path = dbus_runtime_bus(user_name)
+    if bus_path:
+        set_bus_address('unix:path=%s' % bus_path)
+        return
+
     machine_id_file = '/etc/machine-id'
-    with open(machine_id_file, 'r') as f:
-        machine_id = f.readline().strip()
+    machine_id = cached_by_mtime(machine_id_file, read_machine_id)
 
     log.debug('Machine id: %s (from %s)' % (machine_id, machine_id_file))
 
@@ -38,8 +91,9 @@ def dbus_read_user(user_name):
 
     log.debug('Finding session files in %s' % session_path)
 
-    session_files = [os.path.join(session_path, fn) for fn in os.listdir(session_path) if fn.startswith(machine_id)]
-    session_files = sorted(session_files, key=lambda x: -os.stat(x).st_mtime)
+    # directory mtime changes when session files are added or removed, not when one is rewritten:
+    # only the names are cached, the newest one is picked every time
+    session_files = newest_first(cached_by_mtime(session_path, lambda path: list_session_files(path, machine_id)))
 
     log.debug('Possible session files (sorted): %s' % session_files)
 
@@ -49,17 +103,26 @@ def dbus_read_user(user_name):
     dbus_read_env_file(session_files[0])
 
 
-def dbus_read_env_file(file_name):
+def parse_env_file(file_name):
     log.debug('Reading session file: %s' % file_name)
-    expected_var = 'DBUS_SESSION_BUS_ADDRESS'
     value = None
     with open(file_name, 'r') as f:
         for x in f.readlines():
             if x.startswith(expected_var):
                 kv_list = x.strip().split('=')
                 value = '='.join(kv_list[1:])
+    return value
+
+
+def dbus_read_env_file(file_name):
+    value = cached_by_mtime(file_name, parse_env_file)
     if not value:
         log.error("Can't find %s in file %s" % (expected_var, file_name))
         return
-    log.debug('setting %s=%s' % (expected_var, value))
-    os.environ[expected_var] = value
+    set_bus_address(value)
+
+
+def set_bus_address(value):
+    if os.environ.get(expected_var) != value:
+        log.debug('setting %s=%s' % (expected_var, value))
+        os.environ[expected_var] = value
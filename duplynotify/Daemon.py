@@ -0,0 +1,369 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+
+Resident daemon mode. 'duply_notify --daemon' keeps one process (so one
+session bus connection and one set of cached discovery results) and serves
+any number of concurrent backups. 'duply_notify --client ...' spawns
+duplicity itself and hands the read end of its --log-fd pipe to the daemon
+over a Unix socket (SCM_RIGHTS), so the log never passes through the client.
+
+Protocol (JSON lines over the socket):
+    client -> daemon: {"app_name", "icon", "title", "cmd"} + log fd
+    client -> daemon: {"exit": code} once duplicity exited
+    daemon -> client: {"done": true} once the notification is finished
+"""
+import array
+import json
+import os
+import selectors
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+from duplynotify import globals
+from duplynotify.DuplyRunner import DuplyRunner, READ_CHUNK_SIZE, EXIT_GRACE_TIME
+from duplynotify.LineReader import LineSplitter
+
+# how long client waits for daemon to finish notification after duplicity exited
+CLIENT_DONE_TIMEOUT = 10.0
+MAX_HEADER_SIZE = 65536
+
+
+def default_socket_path():
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'duply_notify.sock')
+    return '/tmp/duply_notify-%d.sock' % os.getuid()
+
+
+def peer_uid(sock):
+    """uid of process on the other end of Unix socket, None where SO_PEERCRED isn't available."""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1]
+
+
+def same_user(sock):
+    """
+    Socket may be in /tmp (no XDG_RUNTIME_DIR under cron), where another user
+    could bind it first: log and command line only go to our own user.
+    """
+    uid = peer_uid(sock)
+    return uid is None or uid == os.getuid()
+
+
+def send_json(sock, msg, fds=None):
+    data = json.dumps(msg).encode('utf-8') + b'\n'
+    if fds:
+        sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', fds))])
+    else:
+        sock.sendall(data)
+
+
+def recv_with_fds(sock, size, max_fds=1):
+    """Returns (data, [fds])."""
+    fds = array.array('i')
+    data, ancdata, _, _ = sock.recvmsg(size, socket.CMSG_SPACE(max_fds * fds.itemsize))
+    for level, kind, cmsg_data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(cmsg_data[:len(cmsg_data) - (len(cmsg_data) % fds.itemsize)])
+    return data, list(fds)
+
+
+class Session(object):
+    """One backup served by the daemon: control socket, duplicity log fd and its DuplyRunner."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.control = LineSplitter(MAX_HEADER_SIZE)
+        self.runner = None
+        self.log_fd = None
+        self.splitter = LineSplitter()
+        self.exit_code = None
+        # log fd may stay open a bit after duplicity exited (its children hold the pipe)
+        self.exit_deadline = None
+
+    def start(self, header):
+        runner = DuplyRunner(header.get('cmd') or [], header.get('app_name') or globals.notification_app_name,
+                             header.get('icon') or globals.notification_icon)
+        if header.get('title'):
+            runner.title = header['title']
+        self.runner = runner
+        runner.begin_run()
+
+    def feed_log(self, data):
+        arrival = time.perf_counter() if self.runner.stats else None
+        if data:
+            for line in self.splitter.feed(data):
+                self.runner.handle_line(line, arrival)
+        else:
+            line = self.splitter.flush()
+            if line is not None:
+                self.runner.handle_line(line, arrival)
+
+    def finish(self):
+        runner = self.runner
+        runner.deferred.run_all()
+        try:
+            runner.end_run(self.exit_code)
+        finally:
+            runner.finish_run()
+
+
+class DaemonServer(object):
+    """Single-threaded selectors loop over the listening socket and every session."""
+
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.sel = selectors.DefaultSelector()
+        self.sessions = set()
+        self.listener = None
+
+    def bind(self):
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise OSError('daemon already listens on %s' % self.socket_path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # stale socket of daemon that died
+                os.unlink(self.socket_path)
+            finally:
+                probe.close()
+
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            self.listener.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self.listener.listen(16)
+        self.listener.setblocking(False)
+        self.sel.register(self.listener, selectors.EVENT_READ, None)
+
+    def serve_forever(self):
+        self.bind()
+        print('duply_notify daemon: listening on %s' % self.socket_path)
+        try:
+            while True:
+                self.run_once()
+        finally:
+            for session in list(self.sessions):
+                self.close_session(session, -1)
+            self.sel.close()
+            self.listener.close()
+            os.unlink(self.socket_path)
+
+    def next_timeout(self):
+        res = None
+        now = time.monotonic()
+        for session in self.sessions:
+            candidates = []
+            if session.runner is not None:
+                candidates.append(session.runner.deferred.next_timeout())
+            if session.exit_deadline is not None:
+                candidates.append(max(0.0, session.exit_deadline - now))
+            for timeout in candidates:
+                if timeout is not None and (res is None or timeout < res):
+                    res = timeout
+        return res
+
+    def run_once(self):
+        for key, _ in self.sel.select(self.next_timeout()):
+            if key.data is None:
+                self.accept()
+                continue
+            session, is_log = key.data
+            if session not in self.sessions:
+                # closed earlier in this batch
+                continue
+            try:
+                if is_log:
+                    self.read_log(session)
+                else:
+                    self.read_control(session)
+            except Exception as e:
+                print('duply_notify daemon: session failed: %s' % e)
+                self.close_session(session, -1)
+
+        now = time.monotonic()
+        for session in list(self.sessions):
+            if session.runner is not None:
+                session.runner.deferred.run_due()
+            if session.exit_deadline is not None and now >= session.exit_deadline:
+                self.close_session(session, session.exit_code)
+
+    def accept(self):
+        try:
+            conn, _ = self.listener.accept()
+        except BlockingIOError:
+            return
+        if not same_user(conn):
+            print('duply_notify daemon: refused connection of uid %s' % peer_uid(conn))
+            conn.close()
+            return
+        session = Session(conn)
+        self.sessions.add(session)
+        self.sel.register(conn, selectors.EVENT_READ, (session, False))
+
+    def read_control(self, session):
+        if session.runner is None:
+            data, fds = recv_with_fds(session.conn, READ_CHUNK_SIZE)
+            if fds:
+                session.log_fd = fds[0]
+                for fd in fds[1:]:
+                    os.close(fd)
+        else:
+            data = session.conn.recv(READ_CHUNK_SIZE)
+
+        if not data:
+            # client is gone; finish with whatever arrived
+            self.close_session(session, session.exit_code if session.exit_code is not None else -1, False)
+            return
+
+        for line in session.control.feed(data):
+            msg = json.loads(line.decode('utf-8'))
+            if session.runner is None:
+                if session.log_fd is None:
+                    raise ValueError('client sent no log fd')
+                session.start(msg)
+                self.sel.register(session.log_fd, selectors.EVENT_READ, (session, True))
+            elif 'exit' in msg:
+                session.exit_code = msg['exit']
+                if session.log_fd is None:
+                    self.close_session(session, session.exit_code)
+                    return
+                session.exit_deadline = time.monotonic() + EXIT_GRACE_TIME
+
+    def read_log(self, session):
+        data = os.read(session.log_fd, READ_CHUNK_SIZE)
+        session.feed_log(data)
+        if not data:
+            self.sel.unregister(session.log_fd)
+            os.close(session.log_fd)
+            session.log_fd = None
+            if session.exit_code is not None:
+                self.close_session(session, session.exit_code)
+
+    def close_session(self, session, exit_code, reply=True):
+        if session not in self.sessions:
+            return
+        self.sessions.discard(session)
+        session.exit_code = exit_code
+        if session.log_fd is not None:
+            self.sel.unregister(session.log_fd)
+            os.close(session.log_fd)
+            session.log_fd = None
+        try:
+            if session.runner is not None:
+                session.finish()
+                if reply:
+                    send_json(session.conn, {'done': True})
+        except Exception as e:
+            print('duply_notify daemon: %s' % e)
+        finally:
+            self.sel.unregister(session.conn)
+            session.conn.close()
+
+
+def run_daemon(socket_path):
+    if globals.save_duply_log_file_name or globals.events_fd is not None or globals.events_file or \
+            globals.prom_textfile or globals.timeline_json:
+        # concurrent sessions would overwrite each other's output
+        print('duply_notify daemon: --debug-log, --events-*, --prom-textfile and --timeline-json are ignored'
+              ' in daemon mode')
+        globals.save_duply_log_file_name = None
+        globals.events_fd = globals.events_file = None
+        globals.prom_textfile = globals.timeline_json = None
+    # finish sessions and remove socket on 'systemctl stop' too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        DaemonServer(socket_path).serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def watch_daemon(sock, log_fd, done):
+    """
+    Client thread: waits for daemon's reply. If daemon goes away before, it
+    reads (and drops) the rest of duplicity log, so duplicity writes neither
+    fail nor block. Owns log_fd.
+    """
+    try:
+        try:
+            data = sock.recv(READ_CHUNK_SIZE)
+        except OSError:
+            data = b''
+        if data:
+            return
+        print('duply_notify: daemon went away, backup goes on without notification')
+        done.set()
+        while os.read(log_fd, READ_CHUNK_SIZE):
+            pass
+    finally:
+        done.set()
+        os.close(log_fd)
+
+
+def run_client(cmd, socket_path, app_name, icon, title):
+    """
+    Runs duplicity with the daemon showing progress. Returns None when there's
+    no daemon, so caller can run everything in-process instead. Once started,
+    duplicity's exit code is returned even if daemon dies meanwhile.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    if not same_user(sock):
+        print('duply_notify: %s belongs to uid %s, not using it' % (socket_path, peer_uid(sock)))
+        sock.close()
+        return None
+
+    proc_obj = None
+    try:
+        logfd_read, logfd_write = os.pipe()
+        try:
+            send_json(sock, {'app_name': app_name, 'icon': icon, 'title': title, 'cmd': cmd}, [logfd_read])
+        except OSError:
+            os.close(logfd_read)
+            os.close(logfd_write)
+            raise
+        # our copy of the read end is only used if daemon dies
+        done = threading.Event()
+        threading.Thread(target=watch_daemon, args=(sock, logfd_read, done), name='watch_daemon',
+                         daemon=True).start()
+
+        os.set_inheritable(logfd_write, True)
+        try:
+            proc_obj = subprocess.Popen(cmd + ['--log-fd', str(logfd_write)], close_fds=False,
+                                        stdin=subprocess.DEVNULL, shell=False)
+        finally:
+            os.close(logfd_write)
+        res = proc_obj.wait()
+
+        try:
+            send_json(sock, {'exit': res})
+        except OSError:
+            # daemon is gone, watch_daemon noticed it too
+            pass
+        # notification is finished before cron job reports completion
+        done.wait(CLIENT_DONE_TIMEOUT)
+        return res
+    finally:
+        if proc_obj is not None and proc_obj.returncode is None:
+            proc_obj.kill()
+            proc_obj.wait()
+        sock.close()
@@ -0,0 +1,62 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import heapq
+import itertools
+import time
+
+
+class DeferredCall(object):
+    __slots__ = ('deadline', 'callback', 'args', 'cancelled')
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class DeferredQueue(object):
+    """
+    Timers for the reader loop. Nothing here sleeps: the loop calls run_due()
+    whenever it wakes up and uses next_timeout() to bound its wait.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.heap = []
+        self.counter = itertools.count()
+
+    def call_later(self, delay, callback, *args):
+        call = DeferredCall(self.clock() + delay, callback, args)
+        heapq.heappush(self.heap, (call.deadline, next(self.counter), call))
+        return call
+
+    def next_timeout(self):
+        """Seconds until the next pending call, None if there is nothing to wait for."""
+        while self.heap and self.heap[0][2].cancelled:
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return None
+        return max(0.0, self.heap[0][0] - self.clock())
+
+    def run_due(self):
+        now = self.clock()
+        while self.heap and self.heap[0][0] <= now:
+            _, _, call = heapq.heappop(self.heap)
+            if not call.cancelled:
+                call.callback(*call.args)
+
+    def run_all(self):
+        """Fire everything that is pending now (used on exit). Calls scheduled by callbacks are kept."""
+        pending, self.heap = sorted(self.heap), []
+        for _, _, call in pending:
+            if not call.cancelled:
+                call.callback(*call.args)
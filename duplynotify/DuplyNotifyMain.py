@@ -12,15 +12,19 @@ duply_notify is a duplicity wrapper that shows progress in KDE notification area
 @contact:    dion@dion.org.ua
 """
 import logging
+import re
+import shlex
 import sys
 import os
 
 from argparse import ArgumentParser
+from argparse import ArgumentTypeError
 from argparse import RawDescriptionHelpFormatter
 
+from duplynotify.Backends import BACKENDS, DEFAULT_BACKEND, create_backend
 from duplynotify.DBusEnv import dbus_update_environment
 from duplynotify.DuplyRunner import DuplyRunner
-from duplynotify.JobViewClient import JobViewClient
+from duplynotify.PhaseTimeline import BOUND_BY
 from duplynotify import globals
 
 __all__ = []
@@ -46,18 +50,87 @@ class CLIError(Exception):
 
 
 def test_dbus():
-    dbus_update_environment()
-    client = JobViewClient()
+    client = create_backend(globals.notification_backend)
+    if client.USES_SESSION_BUS:
+        dbus_update_environment()
     msg = 'Press Enter to exit'
     client.start(globals.notification_app_name, globals.notification_icon, 0)
     client.set_info_message("duply_notify test")
     client.set_description_field(0, 'test', msg)
+    client.commit()
     print(msg)
     sys.stdin.readline()
     client.stop()
 
 
+def parse_replay_from(value):
+    """Phase name, seconds, 1h20m5s or H:M:S -> (seconds, phase)."""
+    if value in BOUND_BY:
+        return None, value
+    try:
+        if ':' in value:
+            res = 0.0
+            for part in value.split(':'):
+                res = res * 60 + float(part)
+            return res, None
+        if value[-1:] in 'hms':
+            res = 0.0
+            for num, unit in re.findall(r'([\d.]+)([hms])', value):
+                res += float(num) * {'h': 3600, 'm': 60, 's': 1}[unit]
+            if re.sub(r'[\d.]+[hms]', '', value):
+                raise ValueError(value)
+            return res, None
+        return float(value), None
+    except ValueError:
+        raise CLIError('bad --replay-from value: %s (use one of %s or time offset)' %
+                       (value, ', '.join(sorted(BOUND_BY))))
+
+
+def parse_replay_speed(value):
+    """Factor or 'max' (None)."""
+    if value == 'max':
+        return None
+    try:
+        res = float(value)
+    except ValueError:
+        res = 0
+    if res <= 0:
+        raise ArgumentTypeError('bad --replay-speed value: %s (use positive number or max)' % value)
+    return res
+
+
+def multi_jobs(cmd, profiles, commands):
+    """--profile NAME fills {profile} in cmd (default: duply {profile} backup); --command is one command line."""
+    res = []
+    if profiles:
+        template = cmd or ['duply', '{profile}', 'backup']
+        if not any('{profile}' in x for x in template):
+            raise CLIError('command for --profile needs {profile} placeholder')
+        for profile in profiles:
+            res.append((profile, [x.replace('{profile}', profile) for x in template]))
+    elif cmd:
+        res.append((os.path.basename(cmd[0]), cmd))
+    for command in commands or []:
+        args = shlex.split(command)
+        name = args[1] if len(args) > 1 and os.path.basename(args[0]) == 'duply' else os.path.basename(args[0])
+        res.append((name, args))
+    return res
+
+
 def run_me(cmd):
+    if globals.multi_jobs:
+        from duplynotify.MultiRunner import MultiRunner
+        return MultiRunner(globals.multi_jobs, globals.multi_parallel, globals.multi_child_views).run()
+
+    if globals.daemon_client and not globals.replay_log_file_name:
+        from duplynotify.Daemon import default_socket_path, run_client
+        res = run_client(cmd, globals.daemon_socket or default_socket_path(), globals.notification_app_name,
+                         globals.notification_icon, globals.notification_title)
+        if res is not None:
+            return res
+        if globals.verbose:
+            print("no duply_notify daemon, running standalone")
+
     runner = DuplyRunner(cmd, globals.notification_app_name, globals.notification_icon)
     if globals.replay_log_file_name:
         return runner.run_fake(globals.replay_log_file_name)
@@ -70,6 +143,10 @@ def main(argv=None):  # IGNORE:C0111
     if argv is not None:
         sys.argv.extend(argv)
 
+    if len(sys.argv) > 1 and sys.argv[1] == 'analyze':
+        from duplynotify.Analyzer import main as analyze_main
+        return analyze_main(sys.argv[2:])
+
     program_name = os.path.basename(sys.argv[0])
     program_version = "v%s" % __version__
     program_build_date = str(__updated__)
@@ -77,6 +154,8 @@ def main(argv=None):  # IGNORE:C0111
     program_shortdesc = __import__('__main__').__doc__.split("\n")[1]
     program_license = '''%s
 
+  '%s analyze DIR...' summarizes captured --debug-log files instead.
+
   Created by Dmitry Nezhevenko on %s.
   Copyright 2016 Dmitry Nezhevenko. All rights reserved.
 
@@ -86,7 +165,7 @@ def main(argv=None):  # IGNORE:C0111
   or conditions of any kind, either express or implied.
 
 USAGE
-''' % (program_shortdesc, str(__date__))
+''' % (program_shortdesc, program_name, str(__date__))
 
     try:
         # Setup argument parser
@@ -102,6 +181,11 @@ USAGE
         icon_opts.add_argument('-n', '--name', action='store', default='duply',
                                help='application name for notification (default: duply)')
         icon_opts.add_argument('-i', '--icon', action='store', default='ark', help='notification icon (default: ark)')
+        icon_opts.add_argument('-b', '--backend', action='store', default=DEFAULT_BACKEND,
+                               choices=sorted(BACKENDS),
+                               help='where to show progress (default: %s)' % DEFAULT_BACKEND)
+        icon_opts.add_argument('--update-rate', type=float, dest='update_rate', action='store', default=4.0,
+                               help='max notification updates per second, 0 to send every change (default: 4)')
 
         # dbus stuff
         dbus_opts = parser.add_argument_group('dbus', 'how to connect to DBus daemon')
@@ -111,19 +195,112 @@ USAGE
                                     ' (if current session has no DBUS_SESSION_BUS_ADDRESS).')
         dbus_excl.add_argument('--dbus-user', dest='dbus_user', action='store',
                                help='guess environment for user (from /home/$USER/.dbus/session-bus)')
+        dbus_opts.add_argument('--dbus-async', dest='dbus_async', action='store_true',
+                               help="don't wait for notification server replies (needs python3-gi)")
+        dbus_opts.add_argument('--dbus-max-in-flight', type=int, dest='dbus_max_in_flight', action='store', default=8,
+                               help='max unanswered calls in --dbus-async mode (default: 8)')
         dbus_opts.add_argument('--dbus-test', '--test-dbus', dest='test_dbus', action='store_true',
                                help="just try to show notification without backup. Useful for dbus testing")
 
+        # metrics
+        metrics_opts = parser.add_argument_group('metrics', 'backup run metrics')
+        metrics_opts.add_argument('--prom-textfile', dest='prom_textfile', action='store', default=None,
+                                  help='write Prometheus node_exporter textfile (e.g. '
+                                       '/var/lib/node_exporter/textfile_collector/duply.prom) when backup ends;'
+                                       ' with several backups one file each (duply.NAME.prom)')
+        metrics_opts.add_argument('--prom-interval', type=float, dest='prom_interval', action='store', default=0,
+                                  help='also refresh --prom-textfile every N seconds while running')
+        metrics_opts.add_argument('--events-fd', type=int, dest='events_fd', action='store', default=None,
+                                  help='write progress, phase, volume and exit events as JSON lines to this fd')
+        metrics_opts.add_argument('--events-file', dest='events_file', action='store', default=None,
+                                  help='append events as JSON lines to this file (or FIFO)')
+        metrics_opts.add_argument('--timeline', dest='timeline', action='store_true',
+                                  help='print per-phase and per-volume timing report at exit')
+        metrics_opts.add_argument('--timeline-json', dest='timeline_json', action='store', default=None,
+                                  help='save per-phase and per-volume timing report as JSON'
+                                       ' (with several backups: one file each, like --prom-textfile)')
+        metrics_opts.add_argument('--history', dest='history', action='store_true',
+                                  help='record runs in sqlite database and predict total size and ETA from past'
+                                       ' runs of the same backup (database: ~/.local/share/duply_notify/'
+                                       'history.sqlite, under $XDG_DATA_HOME if set)')
+        metrics_opts.add_argument('--history-file', dest='history_file', action='store', default=None,
+                                  metavar='FILE', help='run history database, implies --history')
+        metrics_opts.add_argument('--hot-dirs', type=int, dest='hot_dirs', action='store', default=0, metavar='N',
+                                  help='print N directories with the most changed files at exit')
+        metrics_opts.add_argument('--hot-dirs-budget', type=int, dest='hot_dirs_budget', action='store',
+                                  default=5000, metavar='NODES',
+                                  help='directories tracked for --hot-dirs at most; smaller ones are merged'
+                                       ' into parents (default: %(default)s)')
+        metrics_opts.add_argument('--hot-dirs-size', dest='hot_dirs_size_root', action='store', default=None,
+                                  metavar='SOURCE_DIR',
+                                  help='weight --hot-dirs by file size, looking files up under backup source dir')
+        metrics_opts.add_argument('--proc-interval', type=float, dest='proc_interval', action='store', default=2.0,
+                                  help='sample CPU and disk I/O of duplicity, gpg and par2 from /proc this often and'
+                                       ' show them in status during gpg and par2 phases (0 - off, default: 2)')
+
+        # throttle
+        throttle_opts = parser.add_argument_group('throttle', 'limit impact of backup by pausing duplicity'
+                                                              ' (SIGSTOP/SIGCONT) for part of every period')
+        throttle_opts.add_argument('--throttle-read', type=float, dest='throttle_read', action='store', default=None,
+                                   help='max disk read rate of duplicity and its children, MB/s')
+        throttle_opts.add_argument('--throttle-cpu', type=float, dest='throttle_cpu', action='store', default=None,
+                                   help='max CPU usage of duplicity and its children, percent of one core')
+        throttle_opts.add_argument('--throttle-upload', type=float, dest='throttle_upload', action='store',
+                                   default=None, help='max upload rate, MB/s')
+        throttle_opts.add_argument('--throttle-period', type=float, dest='throttle_period', action='store',
+                                   default=1.0, help='duty cycle period, seconds (default: 1)')
+
+        # daemon
+        daemon_opts = parser.add_argument_group('daemon', 'resident daemon shared by all backups')
+        daemon_opts.add_argument('--daemon', dest='daemon', action='store_true',
+                                 help='run as daemon showing progress of backups started with --client')
+        daemon_opts.add_argument('--client', dest='client', action='store_true',
+                                 help='let running daemon show progress (runs standalone if there is none)')
+        daemon_opts.add_argument('--socket', dest='socket', action='store', default=None,
+                                 help='daemon socket (default: $XDG_RUNTIME_DIR/duply_notify.sock)')
+
+        # several backups
+        multi_opts = parser.add_argument_group('multiple backups', 'run several backups with one aggregated view')
+        multi_opts.add_argument('--profile', dest='profiles', action='append', default=None,
+                                help='duply profile to back up, may be repeated; command is a template with'
+                                     ' {profile} (default: duply {profile} backup)')
+        multi_opts.add_argument('--command', dest='commands', action='append', default=None,
+                                help='one more backup command line (shell quoted), may be repeated')
+        multi_opts.add_argument('--parallel', type=int, dest='parallel', action='store', default=1,
+                                help='how many backups run at once (default: 1)')
+        multi_opts.add_argument('--child-views', dest='child_views', action='store_true',
+                                help='also show separate progress of every backup')
+
         # debug
         debug_opts = parser.add_argument_group('debug', 'debugging stuff')
         debug_opts.add_argument("-v", "--verbose", dest="verbose", action="store_true", help="set verbosity")
 
+        debug_opts.add_argument('--dbus-stats', dest='dbus_stats', action='store_true',
+                                help='print DBus call latency and notification lag summary at exit'
+                                     ' (always on with --verbose)')
         debug_opts.add_argument('--debug-log', dest='debug_log', action='store', default=None,
                                 help='save duplicity machine-readable log to file')
+        debug_opts.add_argument('--debug-log-compress', dest='debug_log_compress', action='store', default=None,
+                                choices=['none', 'gzip', 'xz'],
+                                help='compress --debug-log (default: guess from .gz/.xz file extension)')
+        debug_opts.add_argument('--debug-log-max-size', type=int, dest='debug_log_max_size', action='store',
+                                default=0,
+                                help='start new --debug-log segment (file.1, file.2, ...) after this many MB')
+        debug_opts.add_argument('--debug-log-format', dest='debug_log_format', action='store', default=None,
+                                choices=['text', 'compact'],
+                                help='--debug-log format; compact is indexed for --replay-from, never compressed'
+                                     ' (default: compact for .dnc files)')
         debug_opts.add_argument('--replay-log', dest='replay_log', action='store', default=None,
                                 help='parse provided log file instead of running duplicity')
-        debug_opts.add_argument('--replay-speed', type=float, dest='replay_speed', action='store', default=1.0,
-                                help='replay speed (2 will replay 2 times faster)')
+        debug_opts.add_argument('--replay-speed', type=parse_replay_speed, dest='replay_speed', action='store',
+                                default=1.0,
+                                help='replay speed (2 will replay 2 times faster, max - no waiting at all)')
+        debug_opts.add_argument('--replay-max-gap', type=float, dest='replay_max_gap', action='store', default=1.0,
+                                help='shorten longer pauses between replayed lines to this many seconds'
+                                     ' (0 - keep original timing, default: %(default)s)')
+        debug_opts.add_argument('--replay-from', dest='replay_from', action='store', default=None,
+                                help='start replay at phase (sync, collection, scan, gpg, par2, upload) or time'
+                                     ' offset (90, 1m30s, 0:01:30)')
 
         parser.add_argument('cmd', nargs='*', action='store', help='duplicity/duply command line')
 
@@ -132,7 +309,8 @@ USAGE
 
         verbose = args.verbose
 
-        if len(args.cmd) == 0 and not args.replay_log and not args.test_dbus:
+        if len(args.cmd) == 0 and not args.replay_log and not args.test_dbus and not args.daemon \
+                and not args.profiles and not args.commands:
             parser.print_usage()
             return 1
 
@@ -144,17 +322,72 @@ USAGE
         globals.notification_title = args.title
         globals.notification_app_name = args.name
         globals.notification_icon = args.icon
+        globals.notification_backend = args.backend
+        globals.update_rate = args.update_rate
 
         globals.dbus_user = args.dbus_user
         globals.dbus_env = args.dbus_env
-
+        globals.dbus_async = args.dbus_async
+        globals.dbus_max_in_flight = max(1, args.dbus_max_in_flight)
+
+        globals.dbus_stats = args.dbus_stats or verbose
+        globals.prom_textfile = args.prom_textfile
+        globals.prom_interval = args.prom_interval
+        globals.timeline = args.timeline
+        globals.events_fd = args.events_fd
+        globals.events_file = args.events_file
+        globals.timeline_json = args.timeline_json
+        globals.proc_interval = args.proc_interval
+        globals.hot_dirs = args.hot_dirs
+        globals.hot_dirs_budget = args.hot_dirs_budget
+        globals.hot_dirs_size_root = args.hot_dirs_size_root
+        globals.history = args.history or args.history_file is not None
+        globals.history_file = args.history_file
         globals.save_duply_log_file_name = args.debug_log
+        if args.debug_log_compress == 'none':
+            globals.save_duply_log_compression = False
+        else:
+            globals.save_duply_log_compression = args.debug_log_compress
+        globals.save_duply_log_max_size = args.debug_log_max_size * 1024 * 1024
         globals.replay_log_file_name = args.replay_log
         globals.replay_log_speed = args.replay_speed
+        globals.replay_max_gap = args.replay_max_gap or None
+        globals.save_duply_log_format = args.debug_log_format
+        if args.debug_log and (args.debug_log_format == 'compact' or
+                               (args.debug_log_format is None and args.debug_log.endswith('.dnc'))):
+            if args.debug_log_compress not in (None, 'none') or args.debug_log_max_size:
+                raise CLIError('compact --debug-log is never compressed or split:'
+                               ' drop --debug-log-compress/--debug-log-max-size or use --debug-log-format text')
+        if args.replay_from:
+            globals.replay_from_time, globals.replay_from_phase = parse_replay_from(args.replay_from)
+
+        if args.profiles or args.commands:
+            globals.multi_jobs = multi_jobs(args.cmd, args.profiles, args.commands)
+            globals.multi_parallel = args.parallel
+            globals.multi_child_views = args.child_views
+            if globals.save_duply_log_file_name or globals.events_fd is not None or globals.events_file:
+                # concurrent backups would overwrite each other's output
+                print('--debug-log and --events-* are ignored with several backups')
+                globals.save_duply_log_file_name = None
+                globals.events_fd = globals.events_file = None
+
+        if args.throttle_read:
+            globals.throttle_read = args.throttle_read * 1024 * 1024
+        if args.throttle_upload:
+            globals.throttle_upload = args.throttle_upload * 1024 * 1024
+        globals.throttle_cpu = args.throttle_cpu
+        globals.throttle_period = max(0.1, args.throttle_period)
+
+        globals.daemon_socket = args.socket
+        globals.daemon_client = args.client
 
         if args.test_dbus:
             return test_dbus()
 
+        if args.daemon:
+            from duplynotify.Daemon import default_socket_path, run_daemon
+            return run_daemon(globals.daemon_socket or default_socket_path())
+
         return run_me(args.cmd)
 
     except KeyboardInterrupt:
@@ -5,16 +5,51 @@ License: GPLv2+
 
 @author: dion
 """
+import collections
 import subprocess
-import re
+import selectors
+import signal
+import sys
 import time
 import os
-from dbus.exceptions import DBusException
 
 from duplynotify import globals
+from duplynotify.Backends import create_backend
+from duplynotify.Backoff import Backoff
+from duplynotify.Capture import CaptureWriter, open_capture
+from duplynotify.CompactCapture import CompactCaptureWriter
 from duplynotify.DBusEnv import dbus_update_environment
-from duplynotify.JobViewClient import JobViewClient
+from duplynotify.DeferredQueue import DeferredQueue
+from duplynotify.EventStream import EventStream
+from duplynotify.Events import EventParser, BackupName, MainAction, PhaseChange, CacheCopy, Progress, FileChanged, \
+    VolumeWritten, UploadBegin, UploadDone
+from duplynotify.History import open_history
+from duplynotify.HotDirs import HotDirs
+from duplynotify.LineReader import LineSplitter
+from duplynotify.PhaseTimeline import PhaseTimeline
+from duplynotify.ProcStat import TreeSampler, process_tree, rates_by_name
+from duplynotify.PrometheusExporter import PrometheusExporter
+from duplynotify.RunMetrics import RunMetrics
+from duplynotify.Stats import Stats
+from duplynotify.Throttle import Throttle
+from duplynotify.Throughput import ThroughputAnalyzer
 from duplynotify.TimedReader import TimedReader
+from duplynotify.UpdateScheduler import UpdateScheduler
+
+
+READ_CHUNK_SIZE = 65536
+# how long to keep reading after duplicity exited (its children may hold the log pipe)
+EXIT_GRACE_TIME = 1.0
+# how long duplicity in its own process group may take to exit after forwarded Ctrl-C
+INTERRUPT_GRACE_TIME = 5.0
+# child exit polling interval when os.pidfd_open is not available
+EXIT_POLL_TIME = 0.5
+# selector data of child output that can't be forwarded any more
+DISCARD_OUTPUT = object()
+# phases in which process tree usage is shown in status
+SAMPLER_PHASES = ('gpg', 'par2')
+# predicted ETA refresh interval
+PREDICTION_INTERVAL = 5.0
 
 
 def print_sleep(msg):
@@ -26,8 +61,14 @@ class DuplyRunner(object):
         self.cmd_line = cmd_line
         self.app_name = app_name
         self.icon = icon
+        self.title = globals.notification_title
+        self.backend = globals.notification_backend
         self.job = None
+        self.reconnect = Backoff()
         self.debug_log_fd = None
+        self.event_stream = None
+        self.reported_phase = None
+        self.stats = Stats() if globals.dbus_stats else None
 
         self.processed_handler = None
 
@@ -36,109 +77,236 @@ class DuplyRunner(object):
         self.is_estimate_done = False
         self.last_info_message = None
         self.last_file_name = None
-        self.last_file_name_rate_dict = {}
         self.last_volume_name = None
         self.last_status = None
+        # while set, status changes are postponed until the timer fires
+        self.status_hold = None
+        self.held_status = None
+        self.deferred = DeferredQueue()
         self.is_uploading = False
         self.is_adding_files = False
-
-        self.RE_PATTERNS = [
-            (re.compile(r'Using backup name: (.*)$'), self.re_backup_name),
-            (re.compile(r'Main action: (.*)$'), self.re_main_action),
-            ('Synchronizing remote metadata to local cache...', self.re_print_line),
-            (re.compile(r'Copying (.*) to local cache.'), self.re_copy_to_local),
-            ('Collection Status', self.re_handle_collection_status),
-            (re.compile(r'AsyncScheduler: instantiating at concurrency.*$'), self.re_handle_startup),
-            (re.compile(r'Writing (.*\.gpg)$'), self.re_write_gpg),
-            ('Create Par2 recovery files', self.re_par2),
-        ]
-        self.RE_HEAD_PATTERNS = [
-            # changed_bytes, elapsed, progress, eta, speed, stalled)
-            (re.compile(r'NOTICE 16 (?P<changed_bytes>\d+) (?P<elapsed>\d+) '
-                        '(?P<progress>\d+) (?P<eta>\d+) (?P<speed>\d+) (?P<stalled>\d+)'),
-             self.re_progress),
-            (re.compile(r'INFO (4|5|6) \'(?P<file_name>.*)\''), self.re_diff_file),
-            (re.compile(r'INFO (11|12)'), self.re_upload_begin),
-            (re.compile(r'INFO (13|14)'), self.re_upload_done),
-        ]
+        self.throughput = ThroughputAnalyzer()
+        self.metrics = RunMetrics()
+        self.timeline = PhaseTimeline()
+        self.hot_dirs = HotDirs(globals.hot_dirs_budget, globals.hot_dirs_size_root) if globals.hot_dirs else None
+        self.exporter = PrometheusExporter(globals.prom_textfile) if globals.prom_textfile else None
+        self.timeline_json = globals.timeline_json
+        # past runs of the same backup (see History); prediction is loaded once backup name is known
+        self.history = None
+        self.record_history = True
+        self.prediction = None
+        self.prediction_tick_started = False
+
+        # suspend/resume/cancel from notification; only when we run duplicity ourselves
+        self.controllable = False
+        # filled by notification main loop thread, handled by our loop (woken up through control_wakeup pipe)
+        self.control_requests = collections.deque()
+        self.control_wakeup = None
+        self.suspended_since = None
+        self.status_before_suspend = None
+        self.cancelling = False
+
+        # key -> text appended to status (see set_status_note)
+        self.status_notes = {}
+        self.throttle = None
+        self.proc_sampler = None
+
+        self.parser = EventParser()
+        self.EVENT_HANDLERS = {
+            BackupName: self.on_backup_name,
+            MainAction: self.on_main_action,
+            PhaseChange: self.on_phase_change,
+            CacheCopy: self.on_cache_copy,
+            Progress: self.on_progress,
+            FileChanged: self.on_file_changed,
+            VolumeWritten: self.on_volume_written,
+            UploadBegin: self.on_upload_begin,
+            UploadDone: self.on_upload_done,
+        }
+        self.PHASE_HANDLERS = {
+            'sync': self.on_sync,
+            'collection': self.on_collection_status,
+            'startup': self.on_startup,
+            'par2': self.on_par2,
+        }
 
     def run(self):
+        self.controllable = True
         return self.run_internal(self.process)
 
     def run_fake(self, captured_logfile):
         self.processed_handler = print_sleep
+        # replayed runs would skew predictions
+        self.record_history = False
         return self.run_internal(lambda: self.process_fake(captured_logfile))
 
     def run_internal(self, runner):
-        self.check_setup_job()
+        self.begin_run()
+        res = None
         try:
-            if globals.save_duply_log_file_name:
-                self.debug_log_fd = open(globals.save_duply_log_file_name, 'w')
             res = runner()
         finally:
-            if self.debug_log_fd:
-                self.debug_log_fd.close()
+            self.end_run(res)
+        self.finish_run()
+        return res
 
+    def begin_run(self):
+        self.check_setup_job()
+        if globals.history:
+            self.history = open_history(globals.history_file)
+        if self.exporter and globals.prom_interval:
+            self.deferred.call_later(globals.prom_interval, self.export_metrics_periodic)
+        # side channels: backup goes on without them if they can't be opened
+        if globals.save_duply_log_file_name:
+            try:
+                self.debug_log_fd = self.create_capture_writer(globals.save_duply_log_file_name)
+            except OSError as e:
+                print("DuplyRunner: no debug log: %s" % e)
+        if globals.events_fd is not None or globals.events_file:
+            try:
+                self.event_stream = EventStream.open(self.deferred, globals.events_fd, globals.events_file)
+            except OSError as e:
+                # e.g. ENXIO: FIFO has no reader
+                print("DuplyRunner: no event stream: %s" % e)
+            else:
+                self.event_stream.emit('start', {'cmd': self.cmd_line})
+
+    def end_run(self, res):
+        if self.debug_log_fd:
+            self.debug_log_fd.close()
+        # exceptions are reported as exit code -1
+        self.metrics.finish(res if res is not None else -1)
+        self.timeline.finish()
+        if self.history:
+            if self.record_history and self.backup_name is not None:
+                self.history.record(self.backup_name, self.backup_main_action, self.metrics,
+                                    self.throughput.changed_bytes, self.timeline.phase_totals())
+            self.history.close()
+        if self.event_stream:
+            self.event_stream.emit('exit', {
+                'exit_code': self.metrics.exit_code,
+                'duration': round(self.metrics.duration(), 3),
+                'changed_bytes': self.throughput.changed_bytes,
+                'volumes': self.metrics.volumes,
+                'uploads': self.metrics.uploads,
+            })
+            self.event_stream.close()
+            if self.event_stream.dropped and globals.verbose:
+                print("EventStream: %d events dropped (slow consumer)" % self.event_stream.dropped)
+        if self.exporter:
+            self.export_metrics()
+        if self.timeline_json:
+            self.timeline.save_json(self.timeline_json)
+
+    def finish_run(self):
         self.cleanup_job()
-        return res
+        if globals.verbose or globals.timeline:
+            print(self.timeline.report())
+        if globals.verbose:
+            print(self.throughput.summary())
+        if self.hot_dirs:
+            print(self.hot_dirs.report(globals.hot_dirs))
+        if self.stats:
+            print(self.stats.summary())
 
     def check_setup_job(self):
+        if not self.job:
+            client = create_backend(self.backend, self.stats)
+            self.job = UpdateScheduler(client, globals.update_rate)
+            if self.controllable:
+                self.job.set_control_handler(self.on_control_request)
+        if self.job.is_ready() or not self.reconnect.ready():
+            return
         try:
-            if not self.job:
-                self.job = JobViewClient()
-            if not self.job.is_ready():
+            if self.job.USES_SESSION_BUS:
                 dbus_update_environment()
-                self.job.start(self.app_name, self.icon, 0)
+            # scheduler re-sends every field that was set before
+            self.job.start(self.app_name, self.icon, self.job.CAPABILITIES if self.controllable else 0)
+            self.reconnect.succeeded()
 
-                if self.last_info_message:
-                    self.set_info_message(self.last_info_message)
-                else:
-                    self.update_info_message()
+            if not self.last_info_message:
+                self.update_info_message()
+
+        except (ValueError, OSError) + self.job.ERRORS as e:
+            delay = self.reconnect.failed()
+            print("DuplyRunner: %s (next try in %d s)" % (e, delay))
 
-                if self.last_status:
-                    self.set_status(self.last_status)
+    @staticmethod
+    def create_capture_writer(file_name):
+        if globals.save_duply_log_format == 'compact' or \
+                (globals.save_duply_log_format is None and file_name.endswith('.dnc')):
+            return CompactCaptureWriter(file_name)
+        return CaptureWriter(file_name, globals.save_duply_log_compression, globals.save_duply_log_max_size)
 
-                if self.last_file_name:
-                    self.set_file_name(self.last_file_name)
+    def export_metrics(self):
+        try:
+            self.exporter.write(self.backup_name, self.metrics, self.throughput, self.timeline)
+        except OSError as e:
+            print("DuplyRunner: can't write metrics: %s" % e)
 
-        except DBusException as e:
-            print("DuplyRunner: %s" % e)
+    def export_metrics_periodic(self):
+        self.export_metrics()
+        self.deferred.call_later(globals.prom_interval, self.export_metrics_periodic)
 
     def cleanup_job(self):
         self.job.set_info_message('')
         for idx in range(0, 2):
             self.job.clear_description_field(idx)
+        self.job.close()
 
     def process(self):
         proc_obj = None
-        log_read_fobj = None
+        logfd_read = None
+        kwargs = {}
         try:
             logfd_read, logfd_write = os.pipe()
 
-            log_read_fobj = os.fdopen(logfd_read, 'r')
             os.set_inheritable(logfd_write, True)
             cmd = self.cmd_line[:]
             cmd.extend(['--log-fd', str(logfd_write)])
 
-            proc_obj = subprocess.Popen(cmd, close_fds=False, stdin=subprocess.DEVNULL, shell=False)
+            if (self.job.CAPABILITIES or self.throttle_enabled()) and not self.has_terminal():
+                # own process group, so suspend/cancel/throttle reach gpg and other children too.
+                # Not with a terminal: background group gets SIGTTIN on passphrase prompt and
+                # misses Ctrl-C, so there kill_process signals duplicity's tree pid by pid
+                if sys.version_info >= (3, 11):
+                    kwargs['process_group'] = 0
+                else:
+                    kwargs['preexec_fn'] = os.setpgrp
+            proc_obj = subprocess.Popen(cmd, close_fds=False, stdin=subprocess.DEVNULL,
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=False, **kwargs)
             os.close(logfd_write)
-            res = self.process_with_fd(proc_obj, log_read_fobj)
+            self.start_process_timers(proc_obj)
+            res = self.process_with_fd(proc_obj, logfd_read)
             return res
+        except KeyboardInterrupt:
+            if proc_obj is not None and kwargs:
+                # terminal's SIGINT doesn't reach duplicity's own group: let it stop cleanly first
+                self.kill_process(proc_obj, signal.SIGINT)
+                try:
+                    proc_obj.wait(INTERRUPT_GRACE_TIME)
+                except subprocess.TimeoutExpired:
+                    pass
+            raise
         except Exception as e:
             print("Backup failed!!!: %s" % e)
             self.job.terminate("Backup failed")
             raise
         finally:
-            log_read_fobj.close()
+            if logfd_read is not None:
+                os.close(logfd_read)
             if proc_obj:
-                proc_obj.kill()
+                self.kill_process(proc_obj, signal.SIGKILL)
+                proc_obj.stdout.close()
+                proc_obj.stderr.close()
 
     def process_fake(self, captured_logfile):
-        fd = open(captured_logfile, 'r')
+        fd = open_capture(captured_logfile, globals.replay_from_time, globals.replay_from_phase)
         try:
-            fd = TimedReader(fd)
-            # noinspection PyTypeChecker
-            res = self.process_with_fd(None, fd)
+            fd = TimedReader(fd, globals.replay_log_speed, globals.replay_max_gap, sleep=self.replay_sleep)
+            res = self.process_reader(fd)
+            if self.stats:
+                print(fd.report())
             return res
         except KeyboardInterrupt:
             print("Keyboard interrupt!!!")
@@ -147,54 +315,306 @@ class DuplyRunner(object):
         finally:
             fd.close()
 
-    def process_with_fd(self, process_obj, log_fd):
+    def replay_sleep(self, seconds):
+        """Waits for the next replayed line, firing timers that are due meanwhile."""
+        deadline = time.monotonic() + seconds
         while True:
-            line = log_fd.readline()
-            if line == '' and (process_obj is None or process_obj.poll() is not None):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            timeout = self.deferred.next_timeout()
+            if timeout is None or timeout >= remaining:
+                time.sleep(remaining)
                 break
-            if line:
-                line = line.strip()
-                if self.debug_log_fd:
-                    self.debug_log_fd.write('[%10.6f] %s\n' % (time.time(), line))
+            time.sleep(timeout)
+            self.deferred.run_due()
 
-                if globals.verbose:
-                    print(line)
+    def process_reader(self, reader):
+        while True:
+            line = reader.readline()
+            if line == b'':
+                break
+            self.handle_line(line, time.perf_counter() if self.stats else None)
+            self.deferred.run_due()
 
-                if self.parse_line(line) and self.processed_handler:
-                    self.processed_handler(line)
+        self.deferred.run_all()
+        return 1
 
-        if process_obj:
-            rc = process_obj.poll()
-        else:
-            rc = 1
-        return rc
+    def process_with_fd(self, process_obj, log_fd):
+        """
+        Event loop: reads duplicity log fd in chunks, forwards its stdout/stderr
+        and watches for child exit, all without blocking on any single source.
+        """
+        splitter = LineSplitter()
+        sel = selectors.DefaultSelector()
+        sel.register(log_fd, selectors.EVENT_READ, None)
+        sel.register(process_obj.stdout, selectors.EVENT_READ, sys.stdout)
+        sel.register(process_obj.stderr, selectors.EVENT_READ, sys.stderr)
+
+        wakeup_read, self.control_wakeup = os.pipe()
+        os.set_blocking(self.control_wakeup, False)
+        sel.register(wakeup_read, selectors.EVENT_READ, self.control_requests)
+
+        pidfd = None
+        if hasattr(os, 'pidfd_open'):
+            try:
+                pidfd = os.pidfd_open(process_obj.pid)
+                sel.register(pidfd, selectors.EVENT_READ, process_obj)
+            except OSError:
+                pidfd = None
+
+        open_streams = 3
+        exit_deadline = None
+        try:
+            while open_streams:
+                timeout = self.deferred.next_timeout()
+                if exit_deadline is not None:
+                    remaining = max(0.0, exit_deadline - time.monotonic())
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                elif pidfd is None:
+                    timeout = EXIT_POLL_TIME if timeout is None else min(timeout, EXIT_POLL_TIME)
+
+                for key, _ in sel.select(timeout):
+                    if key.data is process_obj:
+                        sel.unregister(key.fd)
+                        continue
+                    if key.data is self.control_requests:
+                        os.read(key.fd, READ_CHUNK_SIZE)
+                        continue
+
+                    data = os.read(key.fd, READ_CHUNK_SIZE)
+                    arrival = time.perf_counter() if self.stats else None
+                    if not data:
+                        sel.unregister(key.fd)
+                        open_streams -= 1
+                        if key.data is None:
+                            line = splitter.flush()
+                            if line is not None:
+                                self.handle_line(line, arrival)
+                    elif key.data is None:
+                        for line in splitter.feed(data):
+                            self.handle_line(line, arrival)
+                    elif key.data is not DISCARD_OUTPUT:
+                        try:
+                            key.data.buffer.write(data)
+                            key.data.flush()
+                        except OSError:
+                            # our stdout/stderr is gone: keep draining so duplicity doesn't block
+                            sel.modify(key.fd, selectors.EVENT_READ, DISCARD_OUTPUT)
+
+                if self.control_requests:
+                    self.handle_control_requests(process_obj)
+                self.deferred.run_due()
+
+                if exit_deadline is None:
+                    if process_obj.poll() is not None:
+                        exit_deadline = time.monotonic() + EXIT_GRACE_TIME
+                elif time.monotonic() >= exit_deadline:
+                    break
+        finally:
+            sel.close()
+            if pidfd is not None:
+                os.close(pidfd)
+            wakeup_write, self.control_wakeup = self.control_wakeup, None
+            os.close(wakeup_write)
+            os.close(wakeup_read)
 
-    def parse_line(self, line):
-        if line.startswith('. '):
-            line = line[2:]
-            patterns = self.RE_PATTERNS
-        else:
-            patterns = self.RE_HEAD_PATTERNS
+        self.deferred.run_all()
+        return process_obj.wait()
 
-        for regex, method in patterns:
-            m = None
-            if isinstance(regex, str):
-                if regex == line:
-                    m = line
-            else:
-                m = regex.match(line)
-            if m:
-                self.invoke_handler(method, m)
-                return True
-        return False
+    @staticmethod
+    def kill_process(process_obj, sig):
+        """
+        Signal whole process group when duplicity has its own one, otherwise
+        (group is the terminal's, we are in it too) every process of its tree.
+        """
+        if process_obj.poll() is not None:
+            return
+        try:
+            if os.getpgid(process_obj.pid) == process_obj.pid:
+                os.killpg(process_obj.pid, sig)
+                return
+        except ProcessLookupError:
+            return
+
+        try:
+            # duplicity first: stopped, it doesn't start new children meanwhile
+            pids = process_tree(process_obj.pid)
+        except OSError:
+            # no /proc
+            pids = [process_obj.pid]
+        for pid in pids:
+            try:
+                os.kill(pid, sig)
+            except ProcessLookupError:
+                pass
 
-    def invoke_handler(self, method, match):
+    @staticmethod
+    def has_terminal():
+        """Controlling terminal duplicity (gpg, pinentry) may read passphrase from."""
+        try:
+            os.close(os.open('/dev/tty', os.O_RDONLY | os.O_NOCTTY))
+        except OSError:
+            return False
+        return True
+
+    def start_process_timers(self, process_obj):
+        """/proc usage sampling and throttle duty cycle of duplicity's tree. process_obj needs pid and poll()."""
+        if globals.proc_interval > 0 and os.path.isdir('/proc/%d' % process_obj.pid):
+            self.proc_sampler = TreeSampler(process_obj.pid)
+            self.proc_sampler.sample()
+            self.deferred.call_later(globals.proc_interval, self.invoke_handler, self.sampler_tick, process_obj)
+        if self.throttle_enabled():
+            self.throttle = Throttle(TreeSampler(process_obj.pid), globals.throttle_read, globals.throttle_cpu,
+                                     globals.throttle_upload, globals.throttle_period)
+            # first tick only takes the initial sample
+            self.throttle.sampler.sample()
+            self.deferred.call_later(self.throttle.period, self.invoke_handler, self.throttle_tick, process_obj)
+
+    @staticmethod
+    def throttle_enabled():
+        return bool(globals.throttle_read or globals.throttle_cpu or globals.throttle_upload)
+
+    def throttle_tick(self, process_obj):
+        """Start of duty cycle period: measure the last one, let duplicity run and schedule the stop."""
+        if process_obj.poll() is not None or self.cancelling:
+            return
+        throttle = self.throttle
+        duty = throttle.update(throttle.sampler.sample(), self.timeline.phase)
+        if self.suspended_since is None:
+            self.kill_process(process_obj, signal.SIGCONT)
+            if duty < 1.0:
+                self.deferred.call_later(duty * throttle.period, self.throttle_stop, process_obj)
+        self.set_status_note('throttle', throttle.describe())
+        self.deferred.call_later(throttle.period, self.invoke_handler, self.throttle_tick, process_obj)
+
+    def throttle_stop(self, process_obj):
+        if self.suspended_since is None and not self.cancelling:
+            self.kill_process(process_obj, signal.SIGSTOP)
+
+    def sampler_tick(self, process_obj):
+        """duplicity says nothing while gpg and par2 work: show what its process tree is doing."""
+        if process_obj.poll() is not None:
+            self.set_status_note('sampler', None)
+            return
+        rates = self.proc_sampler.sample()
+        note = None
+        if self.timeline.phase in SAMPLER_PHASES:
+            note = self.format_usage(rates)
+        self.set_status_note('sampler', note)
+        self.deferred.call_later(globals.proc_interval, self.invoke_handler, self.sampler_tick, process_obj)
+
+    def format_usage(self, rates):
+        """'gpg 97% r 12.0 MB/s w 4.1 MB/s, ...' busiest first, idle commands left out."""
+        res = []
+        for usage in sorted(rates_by_name(rates).values(), key=lambda x: -x.cpu):
+            if usage.cpu < 1 and usage.read_bytes < 1024 and usage.write_bytes < 1024:
+                continue
+            text = '%s %d%%' % (usage.name, usage.cpu)
+            for label, value in (('r', usage.read_bytes), ('w', usage.write_bytes)):
+                if value >= 1024:
+                    size, unit = self.format_size(value)
+                    text += ' %s %.1f %s/s' % (label, size, unit)
+            res.append(text)
+        return ', '.join(res) or None
+
+    def on_control_request(self, action):
+        """Notification main loop thread: queue request and wake up our loop."""
+        self.control_requests.append(action)
+        wakeup = self.control_wakeup
+        if wakeup is not None:
+            try:
+                os.write(wakeup, b'\0')
+            except OSError:
+                # pipe is full (loop is woken up anyway) or already closed
+                pass
+
+    def handle_control_requests(self, process_obj):
+        while self.control_requests:
+            action = self.control_requests.popleft()
+            self.invoke_handler(getattr(self, 'on_%s_request' % action), process_obj)
+
+    def on_suspend_request(self, process_obj):
+        if self.suspended_since is not None:
+            return
+        self.kill_process(process_obj, signal.SIGSTOP)
+        self.suspended_since = time.monotonic()
+        self.timeline.suspend()
+        self.report_phase()
+        self.status_before_suspend = self.last_status
+        self.job.set_suspended(True)
+        self.job.set_speed(0)
+        self.set_status('suspended')
+
+    def on_resume_request(self, process_obj):
+        if self.suspended_since is None:
+            return
+        self.kill_process(process_obj, signal.SIGCONT)
+        self.throughput.add_paused(time.monotonic() - self.suspended_since)
+        self.suspended_since = None
+        self.timeline.resume()
+        self.report_phase()
+        self.job.set_suspended(False)
+        if self.status_before_suspend is not None:
+            self.set_status(self.status_before_suspend)
+
+    def on_cancel_request(self, process_obj):
+        self.cancelling = True
+        self.kill_process(process_obj, signal.SIGTERM)
+        # stopped process handles SIGTERM only after SIGCONT
+        self.on_resume_request(process_obj)
+        self.kill_process(process_obj, signal.SIGCONT)
+        self.set_status('cancelling')
+
+    def handle_line(self, line, arrival=None):
+        """arrival is perf_counter() time the line was read (only when stats are on)"""
+        line = line.strip()
+        if globals.verbose:
+            print(line.decode('utf-8', 'replace'))
+
+        handled = self.parse_line(line)
+        # capture mark goes before the line that switched phase, so replay from it sees that line
+        self.report_phase()
+        if self.debug_log_fd:
+            self.debug_log_fd.write(line)
+
+        if handled:
+            if arrival is not None:
+                self.stats.lag.add(time.perf_counter() - arrival)
+            if self.processed_handler:
+                self.processed_handler(line.decode('utf-8', 'replace'))
+
+    def parse_line(self, line):
+        """Dispatch one raw (bytes) log line. Returns True if it was handled."""
+        event = self.parser.parse(line)
+        if event is None:
+            return False
+        self.invoke_handler(self.EVENT_HANDLERS[event.__class__], event)
+        if self.event_stream:
+            self.event_stream.emit_event(event)
+        return True
+
+    def report_phase(self):
+        """Phase change to capture index and event stream."""
+        phase = self.timeline.phase
+        if phase == self.reported_phase:
+            return
+        self.reported_phase = phase
+        if phase is None:
+            return
+        if self.debug_log_fd:
+            self.debug_log_fd.mark_phase(phase)
+        if self.event_stream:
+            self.event_stream.emit('phase', {'phase': phase})
+
+    def invoke_handler(self, method, event):
         try:
             self.check_setup_job()
-            method(match)
-        except DBusException as e:
+            method(event)
+        except self.job.ERRORS as e:
             print("DuplyRunner: %s" % e)
             self.job.stop()
+            self.reconnect.failed()
 
     @staticmethod
     def format_size(size_bytes):
@@ -209,12 +629,21 @@ class DuplyRunner(object):
                 break
         return size, unit
 
+    @staticmethod
+    def scale_size(size_bytes, unit):
+        """size_bytes expressed in unit returned by format_size"""
+        return size_bytes / (1024 ** ['B', 'KB', 'MB', 'GB'].index(unit))
+
+    @staticmethod
+    def format_eta(seconds):
+        return '%d:%02d:%02d' % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
     def set_info_message(self, msg):
         self.last_info_message = msg
         self.job.set_info_message(msg)
 
     def update_info_message(self):
-        res = globals.notification_title
+        res = self.title
         if res is None and self.backup_name is not None:
             res = self.backup_name
         if res is None:
@@ -223,98 +652,191 @@ class DuplyRunner(object):
             res += " (%s)" % self.backup_main_action
         self.set_info_message(res)
 
-    def set_status(self, msg):
+    def set_status(self, msg, hold=0):
+        """Show status. With hold, keep it visible for at least that many seconds."""
         self.last_status = msg
+        if self.status_hold is not None:
+            self.held_status = msg
+            return
+
+        self.show_status(msg)
+        if hold:
+            self.status_hold = self.deferred.call_later(hold, self.invoke_handler, self.release_status, None)
+
+    def show_status(self, msg):
+        if self.status_notes:
+            notes = '; '.join(self.status_notes[x] for x in sorted(self.status_notes))
+            msg = '%s [%s]' % (msg, notes) if msg else notes
         self.job.set_description_field(0, 'status', msg)
 
-    def set_file_name(self, file_name, rate_limit_key=None):
-        self.last_file_name = file_name
-
-        if rate_limit_key is not None:
-            prev_time = self.last_file_name_rate_dict.get(rate_limit_key, 0)
-            new_time = time.time()
-            if new_time - prev_time < 2.0:
-                return
+    def set_status_note(self, key, note):
+        """Extra state (throttle, ...) shown after any status; None removes it."""
+        if self.status_notes.get(key) == note:
+            return
+        if note is None:
+            del self.status_notes[key]
+        else:
+            self.status_notes[key] = note
+        if self.status_hold is None:
+            self.show_status(self.last_status or '')
 
-            self.last_file_name_rate_dict[rate_limit_key] = new_time
+    def release_status(self, _):
+        self.status_hold = None
+        if self.held_status is not None:
+            msg, self.held_status = self.held_status, None
+            self.set_status(msg)
 
+    def set_file_name(self, file_name):
+        self.last_file_name = file_name
         self.job.set_description_field(1, 'file', file_name)
 
-    def re_print_line(self, match):
-        self.set_status(match)
+    def on_phase_change(self, event):
+        self.PHASE_HANDLERS[event.event](event)
 
-    def re_backup_name(self, match):
-        self.backup_name = match.group(1)
-        self.update_info_message()
+    def on_sync(self, event):
+        self.timeline.event('sync')
+        self.set_status(event.message)
 
-    def re_main_action(self, match):
-        self.backup_main_action = match.group(1)
+    def on_backup_name(self, event):
+        self.backup_name = event.name
         self.update_info_message()
+        self.load_prediction()
 
-    def re_copy_to_local(self, match):
-        vol = match.group(1)
-        self.set_file_name(vol)
+    def on_main_action(self, event):
+        self.backup_main_action = event.action
+        self.update_info_message()
+        self.load_prediction()
+
+    def load_prediction(self):
+        if self.history is None or self.backup_name is None:
+            return
+        self.prediction = self.history.predict(self.backup_name, self.backup_main_action)
+        if self.prediction is None:
+            return
+        if globals.verbose:
+            print("History: %d runs, %d bytes, %d s" % (self.prediction.runs, self.prediction.changed_bytes,
+                                                        self.prediction.duration))
+        self.show_prediction()
+        if not self.prediction_tick_started:
+            self.prediction_tick_started = True
+            self.deferred.call_later(PREDICTION_INTERVAL, self.invoke_handler, self.prediction_tick, None)
+
+    def prediction_tick(self, _):
+        """ETA counts down between progress records (there are none without --progress)."""
+        self.show_prediction()
+        self.deferred.call_later(PREDICTION_INTERVAL, self.invoke_handler, self.prediction_tick, None)
+
+    def show_prediction(self):
+        changed_bytes = self.throughput.changed_bytes
+        total_bytes = self.predict_total()
+        _, unit = self.format_size(total_bytes)
+        self.job.set_processed_amount(int(self.scale_size(changed_bytes, unit)), unit)
+        self.job.set_total_amount(int(self.scale_size(total_bytes, unit)), unit)
+        self.show_eta_note(total_bytes)
+
+    def show_eta_note(self, total_bytes):
+        """Predicted ETA next to status; while uploading status has ETA of its own."""
+        note = None
+        if self.prediction is not None and not self.is_uploading:
+            note = 'ETA %s' % self.format_eta(self.predict_eta(total_bytes))
+        self.set_status_note('eta', note)
+
+    def active_time(self):
+        """Run time so far, without time spent suspended."""
+        return self.metrics.duration() - self.timeline.phase_totals().get('suspended', 0.0)
+
+    def predict_total(self):
+        """duplicity's own estimate, blended with history while its progress is low."""
+        analyzer = self.throughput
+        if self.prediction is None:
+            return analyzer.total_bytes()
+        return self.prediction.total_bytes(analyzer.changed_bytes, analyzer.total_bytes(), analyzer.progress)
+
+    def predict_eta(self, total_bytes):
+        if self.prediction is None:
+            return self.throughput.eta()
+        return self.prediction.eta(self.active_time(), self.throughput.changed_bytes, total_bytes)
+
+    def on_cache_copy(self, event):
+        self.set_file_name(event.file_name)
 
     # noinspection PyUnusedLocal
-    def re_handle_collection_status(self, match):
+    def on_collection_status(self, event):
+        self.timeline.event('collection')
         self.set_file_name('')
         self.set_status('Calculating changes')
 
-    def re_handle_startup(self, _):
+    def on_startup(self, _):
         if not self.is_estimate_done:
             self.is_estimate_done = True
             self.is_adding_files = False
-            self.set_status('Backup in progress')
-            time.sleep(10)
+            self.timeline.event('startup')
+            self.set_status('Backup in progress', hold=10)
 
     def mark_estimate_done(self):
         self.is_uploading = False
         self.is_estimate_done = True
 
-    def re_write_gpg(self, match):
+    def on_volume_written(self, event):
         self.mark_estimate_done()
         self.is_adding_files = False
-        self.last_volume_name = match.group(1)
+        self.last_volume_name = event.volume_name
+        self.metrics.volumes += 1
+        self.timeline.event('write_gpg', self.last_volume_name)
         self.set_file_name(self.last_volume_name)
         self.set_status("gpg: %s" % self.last_volume_name)
 
     # noinspection PyUnusedLocal
-    def re_par2(self, match):
+    def on_par2(self, event):
         self.mark_estimate_done()
         self.is_adding_files = False
+        self.timeline.event('par2')
         self.set_status('par2: %s' % self.last_volume_name)
 
-    def re_progress(self, match):
-        # changed_bytes, elapsed, progress, eta, speed, stalled)
-        changed_bytes = int(match.group('changed_bytes'))
+    def on_progress(self, event):
+        changed_bytes = event.changed_bytes
+        progress = event.progress
 
-        progress = int(match.group('progress'))
-        speed = int(match.group('speed'))
-        stalled = int(match.group('stalled'))
-        if stalled:
-            speed = 0
+        analyzer = self.throughput
+        analyzer.update(changed_bytes, event.elapsed, progress, event.speed, event.stalled)
+        total_bytes = self.predict_total()
 
-        changed_value, changed_unit = self.format_size(changed_bytes)
+        # processed and total amounts share one unit
+        _, unit = self.format_size(changed_bytes if total_bytes is None else total_bytes)
+        changed_value = self.scale_size(changed_bytes, unit)
 
         if self.is_uploading:
-            self.set_status('uploading: %d %s' % (changed_value, changed_unit))
+            status = 'uploading: %d %s' % (changed_value, unit)
+            eta = self.predict_eta(total_bytes)
+            if eta is not None:
+                status += ', ETA %s' % self.format_eta(eta)
+            self.set_status(status)
 
         self.job.set_percent(progress)
-        self.job.set_speed(speed)
-        self.job.set_processed_amount(changed_value, changed_unit)
-
-    def re_diff_file(self, match):
-        file_name = match.group('file_name')
-        self.set_file_name(file_name, rate_limit_key='diff_file')
+        self.job.set_speed(analyzer.speed())
+        self.job.set_processed_amount(int(changed_value), unit)
+        if total_bytes is not None:
+            self.job.set_total_amount(int(self.scale_size(total_bytes, unit)), unit)
+        self.show_eta_note(total_bytes)
+
+    def on_file_changed(self, event):
+        self.metrics.files += 1
+        if self.hot_dirs:
+            self.hot_dirs.add(event.file_name, event.kind)
+        self.timeline.event('diff_file')
+        self.set_file_name(event.file_name)
         if not self.is_adding_files:
             self.is_adding_files = True
             if self.is_estimate_done:
                 self.set_status("scanning/adding files")
 
-    def re_upload_begin(self, _):
+    def on_upload_begin(self, _):
+        self.timeline.event('upload_begin')
         self.mark_estimate_done()
         self.is_uploading = True
         self.is_adding_files = False
 
-    def re_upload_done(self, _):
+    def on_upload_done(self, _):
+        self.metrics.uploads += 1
+        self.timeline.event('upload_done')
         self.is_uploading = False
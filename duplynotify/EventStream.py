@@ -0,0 +1,163 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import errno
+import json
+import os
+import select
+import time
+
+from duplynotify.Events import BackupName, MainAction, Progress, VolumeWritten, UploadBegin, UploadDone
+
+# pending events are written at most this long after the first of them was queued
+MAX_LATENCY = 0.2
+# ... or as soon as this much is pending
+BATCH_SIZE = 16384
+# consumer is that far behind: only phase and exit events are still queued
+MAX_PENDING = 1 << 20
+# how long close() may wait for a slow consumer
+CLOSE_TIMEOUT = 1.0
+
+# parsed events that go to the stream (per-file events would flood consumers)
+EVENT_NAMES = {
+    BackupName: 'backup_name',
+    MainAction: 'main_action',
+    Progress: 'progress',
+    VolumeWritten: 'volume',
+    UploadBegin: 'upload_begin',
+    UploadDone: 'upload_done',
+}
+
+# never dropped
+IMPORTANT_EVENTS = ('start', 'phase', 'exit')
+
+
+class EventStream(object):
+    """
+    Newline-delimited JSON events on a fd or file. Writes never block and are
+    batched through the runner's DeferredQueue. When the consumer falls
+    behind (last write was partial), a queued progress event is replaced by
+    the newer one instead of queueing both, so a slow reader only sees fewer
+    progress updates.
+    """
+
+    def __init__(self, fd, deferred, clock=time.time, owned=False):
+        self.fd = fd
+        self.deferred = deferred
+        self.clock = clock
+        # inherited fd shares O_NONBLOCK with the caller (--events-fd 1 would make our stdout
+        # non-blocking too): it stays blocking and is only written when select says it's writable,
+        # at most PIPE_BUF at a time
+        self.nonblocking = owned
+        if owned:
+            os.set_blocking(fd, False)
+        else:
+            # bad --events-fd fails here, not on first write
+            os.fstat(fd)
+
+        # [name, encoded line]; progress entry is updated in place while still queued
+        self.pending = []
+        self.pending_size = 0
+        self.pending_progress = None
+        # tail of a partially written line, goes out before anything else
+        self.partial = b''
+        self.flush_call = None
+
+        self.written = 0
+        self.dropped = 0
+        self.broken = False
+
+    @classmethod
+    def open(cls, deferred, fd=None, file_name=None):
+        if file_name is not None:
+            # O_NONBLOCK: opening a FIFO without reader fails instead of hanging
+            fd = os.open(file_name, os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_NONBLOCK, 0o644)
+            return cls(fd, deferred, owned=True)
+        return cls(fd, deferred)
+
+    def emit(self, name, fields):
+        if self.broken:
+            return
+        msg = {'ts': round(self.clock(), 3), 'event': name}
+        msg.update(fields)
+        line = json.dumps(msg, separators=(',', ':')).encode('utf-8') + b'\n'
+
+        if name == 'progress' and self.partial and self.pending_progress is not None:
+            entry = self.pending_progress
+            self.pending_size += len(line) - len(entry[1])
+            entry[1] = line
+            self.dropped += 1
+            return
+        if self.pending_size + len(self.partial) > MAX_PENDING and name not in IMPORTANT_EVENTS:
+            self.dropped += 1
+            return
+
+        entry = [name, line]
+        self.pending.append(entry)
+        self.pending_size += len(line)
+        if name == 'progress':
+            self.pending_progress = entry
+
+        if self.pending_size >= BATCH_SIZE:
+            self.flush()
+        elif self.flush_call is None:
+            self.flush_call = self.deferred.call_later(MAX_LATENCY, self.flush)
+
+    def emit_event(self, event):
+        """Parsed log event (see Events), if it is one that goes to the stream."""
+        name = EVENT_NAMES.get(event.__class__)
+        if name is not None:
+            self.emit(name, dict((x, getattr(event, x)) for x in event.__slots__))
+
+    def flush(self):
+        """Writes as much as consumer takes now. Returns True when nothing is left."""
+        if self.flush_call is not None:
+            self.flush_call.cancel()
+            self.flush_call = None
+        if self.broken:
+            return True
+
+        data = self.partial + b''.join(x[1] for x in self.pending)
+        self.pending = []
+        self.pending_size = 0
+        self.pending_progress = None
+        self.partial = b''
+        while data:
+            if not self.nonblocking and not select.select([], [self.fd], [], 0)[1]:
+                break
+            try:
+                written = os.write(self.fd, data if self.nonblocking else data[:select.PIPE_BUF])
+            except BlockingIOError:
+                break
+            except OSError as e:
+                self.broken = True
+                if e.errno != errno.EPIPE:
+                    print("EventStream: %s" % e)
+                return True
+            self.written += written
+            data = data[written:]
+
+        if data:
+            # consumer is slow: keep the rest, later events are coalesced until it catches up
+            self.partial = data
+            self.flush_call = self.deferred.call_later(MAX_LATENCY, self.flush)
+            return False
+        return True
+
+    def close(self):
+        deadline = time.monotonic() + CLOSE_TIMEOUT
+        while not self.flush():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            select.select([], [self.fd], [], remaining)
+        if self.flush_call is not None:
+            self.flush_call.cancel()
+            self.flush_call = None
+        # our stdout/stderr are still needed for reports
+        if self.fd > 2:
+            os.close(self.fd)
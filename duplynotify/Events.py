@@ -0,0 +1,268 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+
+Streaming parser of duplicity --log-fd output. No notification or DBus
+dependencies: DuplyRunner is one consumer, anything else (analyzers,
+exporters, scripts) can use iter_events() directly:
+
+    with open('duplicity.log', 'rb') as f:
+        for event in iter_events(f):
+            if event.__class__ is Progress:
+                print(event.progress)
+"""
+import re
+
+
+class Event(object):
+    __slots__ = ()
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__,
+                           ', '.join('%s=%r' % (x, getattr(self, x)) for x in self.__slots__))
+
+    def __eq__(self, other):
+        return self.__class__ is other.__class__ and \
+            all(getattr(self, x) == getattr(other, x) for x in self.__slots__)
+
+
+class BackupName(Event):
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+
+class MainAction(Event):
+    __slots__ = ('action',)
+
+    def __init__(self, action):
+        self.action = action
+
+
+class PhaseChange(Event):
+    """
+    Phase markers without own event class: 'sync', 'collection', 'startup'
+    and 'par2' (see PhaseTimeline.TRANSITIONS). message is the log line.
+    """
+    __slots__ = ('event', 'message')
+
+    def __init__(self, event, message):
+        self.event = event
+        self.message = message
+
+
+class CacheCopy(Event):
+    """Remote metadata file copied to local cache."""
+    __slots__ = ('file_name',)
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+
+
+class Progress(Event):
+    """NOTICE 16 progress record."""
+    __slots__ = ('changed_bytes', 'elapsed', 'progress', 'eta', 'speed', 'stalled')
+
+    def __init__(self, changed_bytes, elapsed, progress, eta, speed, stalled):
+        self.changed_bytes = changed_bytes
+        self.elapsed = elapsed
+        self.progress = progress
+        self.eta = eta
+        self.speed = speed
+        self.stalled = stalled
+
+
+# INFO 4/5/6 code -> FileChanged.kind
+FILE_KINDS = {
+    b'INFO 4': 'changed',
+    b'INFO 5': 'new',
+    b'INFO 6': 'deleted',
+}
+
+
+class FileChanged(Event):
+    __slots__ = ('kind', 'file_name')
+
+    def __init__(self, kind, file_name):
+        self.kind = kind
+        self.file_name = file_name
+
+
+class VolumeWritten(Event):
+    """gpg started writing volume."""
+    __slots__ = ('volume_name',)
+
+    def __init__(self, volume_name):
+        self.volume_name = volume_name
+
+
+class UploadBegin(Event):
+    __slots__ = ('file_name',)
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+
+
+class UploadDone(Event):
+    """size is None when duplicity didn't report it."""
+    __slots__ = ('file_name', 'size')
+
+    def __init__(self, file_name, size):
+        self.file_name = file_name
+        self.size = size
+
+
+def quoted_name(line, start):
+    """'name' starting at start (quote included) -> (name, rest after closing quote) or (None, b'')"""
+    if line[start:start + 1] != b"'":
+        return None, b''
+    end = line.rfind(b"'")
+    if end <= start:
+        return None, b''
+    return line[start + 1:end].decode('utf-8', 'replace'), line[end + 1:]
+
+
+class EventParser(object):
+    """
+    Turns raw (bytes) log lines into events, one line at a time. Header lines
+    are dispatched by their 'LEVEL CODE' key; message lines of other records
+    are matched by literal prefix before any decoding or regex work.
+    """
+
+    def __init__(self):
+        # record key ('NOTICE 16', 'INFO 4', ...) of the last header line seen
+        self.current_key = None
+
+        # '. ' message lines: (literal prefix, exact line or regex, event factory)
+        self.MESSAGE_PATTERNS = [
+            (b'Using backup name: ', re.compile(r'Using backup name: (.*)$'), self.backup_name),
+            (b'Main action: ', re.compile(r'Main action: (.*)$'), self.main_action),
+            (b'Synchronizing remote metadata to local cache...',
+             'Synchronizing remote metadata to local cache...', self.phase_sync),
+            (b'Copying ', re.compile(r'Copying (.*) to local cache.'), self.cache_copy),
+            (b'Collection Status', 'Collection Status', self.phase_collection),
+            (b'AsyncScheduler: instantiating at concurrency',
+             re.compile(r'AsyncScheduler: instantiating at concurrency.*$'), self.phase_startup),
+            (b'Writing ', re.compile(r'Writing (.*\.gpg)$'), self.volume_written),
+            (b'Create Par2 recovery files', 'Create Par2 recovery files', self.phase_par2),
+        ]
+
+        # header lines, keyed by 'LEVEL CODE'. Message lines of these records are skipped
+        self.HEAD_PATTERNS = {
+            b'NOTICE 16': self.progress,
+            b'INFO 4': self.file_changed,
+            b'INFO 5': self.file_changed,
+            b'INFO 6': self.file_changed,
+            b'INFO 11': self.upload_begin,
+            b'INFO 12': self.upload_begin,
+            b'INFO 13': self.upload_done,
+            b'INFO 14': self.upload_done,
+        }
+
+    def parse(self, line):
+        """One stripped log line -> event or None."""
+        if line.startswith(b'. '):
+            if self.current_key in self.HEAD_PATTERNS:
+                return None
+            line = line[2:]
+            for prefix, regex, factory in self.MESSAGE_PATTERNS:
+                if not line.startswith(prefix):
+                    continue
+                text = line.decode('utf-8', 'replace')
+                if isinstance(regex, str):
+                    m = text if regex == text else None
+                else:
+                    m = regex.match(text)
+                if m:
+                    return factory(m)
+            return None
+
+        sp = line.find(b' ')
+        if sp < 0:
+            self.current_key = line or None
+            return None
+        sp2 = line.find(b' ', sp + 1)
+        key = line if sp2 < 0 else line[:sp2]
+        self.current_key = key
+
+        factory = self.HEAD_PATTERNS.get(key)
+        if factory is None:
+            return None
+        return factory(key, line, len(line) if sp2 < 0 else sp2 + 1)
+
+    @staticmethod
+    def backup_name(match):
+        return BackupName(match.group(1))
+
+    @staticmethod
+    def main_action(match):
+        return MainAction(match.group(1))
+
+    @staticmethod
+    def cache_copy(match):
+        return CacheCopy(match.group(1))
+
+    @staticmethod
+    def volume_written(match):
+        return VolumeWritten(match.group(1))
+
+    @staticmethod
+    def phase_sync(text):
+        return PhaseChange('sync', text)
+
+    @staticmethod
+    def phase_collection(text):
+        return PhaseChange('collection', text)
+
+    @staticmethod
+    def phase_startup(match):
+        return PhaseChange('startup', match.group(0))
+
+    @staticmethod
+    def phase_par2(text):
+        return PhaseChange('par2', text)
+
+    # header factories get (key, line, offset of the arguments)
+
+    @staticmethod
+    def progress(key, line, start):
+        # changed_bytes, elapsed, progress, eta, speed, stalled
+        args = line[start:].split()
+        if len(args) < 6:
+            return None
+        try:
+            return Progress(int(args[0]), int(args[1]), int(args[2]), int(args[3]), int(args[4]), int(args[5]))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def file_changed(key, line, start):
+        name, _ = quoted_name(line, start)
+        if name is None:
+            return None
+        return FileChanged(FILE_KINDS[key], name)
+
+    @staticmethod
+    def upload_begin(key, line, start):
+        return UploadBegin(quoted_name(line, start)[0])
+
+    @staticmethod
+    def upload_done(key, line, start):
+        name, rest = quoted_name(line, start)
+        rest = rest.strip()
+        return UploadDone(name, int(rest) if rest.isdigit() else None)
+
+
+def iter_events(f_obj, parser=None):
+    """Events from binary file object (or any iterable of bytes lines) with --log-fd output."""
+    if parser is None:
+        parser = EventParser()
+    parse = parser.parse
+    for line in f_obj:
+        event = parse(line.strip())
+        if event is not None:
+            yield event
@@ -0,0 +1,151 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+
+Per-backup run history (sqlite). Past runs of the same backup name give
+total size and duration before duplicity reports any progress of its own.
+"""
+import json
+import os
+import sqlite3
+
+# successful runs used for prediction
+PREDICT_RUNS = 10
+# rows kept per backup name
+KEEP_RUNS = 100
+# another duply_notify may be recording its run
+LOCK_TIMEOUT = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    backup_name TEXT NOT NULL,
+    main_action TEXT,
+    started REAL NOT NULL,
+    duration REAL NOT NULL,
+    exit_code INTEGER,
+    changed_bytes INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    volumes INTEGER NOT NULL,
+    phases TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_backup_name ON runs (backup_name, id);
+"""
+
+
+def default_history_path():
+    data_dir = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(data_dir, 'duply_notify', 'history.sqlite')
+
+
+def median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    if len(values) % 2:
+        return values[mid]
+    return (values[mid - 1] + values[mid]) / 2.0
+
+
+class Prediction(object):
+    """
+    Median of recent successful runs. Refined by the current run: the more
+    progress there is, the more weight its own numbers get.
+    """
+
+    def __init__(self, runs, changed_bytes, duration, files, volumes):
+        self.runs = runs
+        self.changed_bytes = changed_bytes
+        self.duration = duration
+        self.files = files
+        self.volumes = volumes
+
+    def total_bytes(self, changed_bytes, estimate=None, progress=0):
+        """estimate is duplicity's own total (made from progress percent), None until there is one."""
+        res = self.changed_bytes
+        if estimate is not None:
+            weight = min(1.0, progress / 100.0)
+            res = weight * estimate + (1 - weight) * res
+        return max(int(res), changed_bytes)
+
+    def eta(self, elapsed, changed_bytes, total_bytes):
+        """Seconds left. Run time of past runs, then extrapolated from this run's rate."""
+        res = self.duration - elapsed
+        if changed_bytes and total_bytes:
+            done = min(1.0, changed_bytes / float(total_bytes))
+            extrapolated = elapsed * (1 - done) / done
+            res = done * extrapolated + (1 - done) * res
+        return max(0, int(res))
+
+
+class History(object):
+
+    def __init__(self, file_name):
+        dir_name = os.path.dirname(file_name)
+        if dir_name and not os.path.isdir(dir_name):
+            os.makedirs(dir_name)
+        self.conn = sqlite3.connect(file_name, timeout=LOCK_TIMEOUT)
+        with self.conn:
+            self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def predict(self, backup_name, main_action=None):
+        """Prediction from runs with the same action (full/inc) if there are any, else None."""
+        try:
+            rows = self.select_runs(backup_name, main_action)
+        except sqlite3.Error as e:
+            print("History: %s" % e)
+            return None
+        if not rows:
+            return None
+        return Prediction(len(rows), *(median(column) for column in zip(*rows)))
+
+    def select_runs(self, backup_name, main_action):
+        rows = None
+        if main_action is not None:
+            rows = self.conn.execute(
+                'SELECT changed_bytes, duration, files, volumes FROM runs'
+                ' WHERE backup_name = ? AND main_action = ? AND exit_code = 0 ORDER BY id DESC LIMIT ?',
+                (backup_name, main_action, PREDICT_RUNS)).fetchall()
+        if not rows:
+            rows = self.conn.execute(
+                'SELECT changed_bytes, duration, files, volumes FROM runs'
+                ' WHERE backup_name = ? AND exit_code = 0 ORDER BY id DESC LIMIT ?',
+                (backup_name, PREDICT_RUNS)).fetchall()
+        return rows
+
+    def record(self, backup_name, main_action, metrics, changed_bytes, phases):
+        """phases is PhaseTimeline.phase_totals(); suspended time isn't counted as run time."""
+        phases = dict(phases)
+        suspended = phases.pop('suspended', 0.0)
+        try:
+            self.insert_run(backup_name, main_action, metrics.start_time, metrics.duration() - suspended,
+                            metrics.exit_code, changed_bytes, metrics.files, metrics.volumes, phases)
+        except sqlite3.Error as e:
+            print("History: %s" % e)
+
+    def insert_run(self, backup_name, main_action, started, duration, exit_code, changed_bytes, files, volumes,
+                   phases):
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO runs (backup_name, main_action, started, duration, exit_code, changed_bytes, files,'
+                ' volumes, phases) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (backup_name, main_action, started, duration, exit_code, changed_bytes, files, volumes,
+                 json.dumps(phases, sort_keys=True)))
+            self.conn.execute(
+                'DELETE FROM runs WHERE backup_name = ? AND id NOT IN'
+                ' (SELECT id FROM runs WHERE backup_name = ? ORDER BY id DESC LIMIT ?)',
+                (backup_name, backup_name, KEEP_RUNS))
+
+
+def open_history(file_name=None):
+    """History or None (printing why) if database can't be used."""
+    try:
+        return History(file_name or default_history_path())
+    except (OSError, sqlite3.Error) as e:
+        print("History: %s" % e)
+        return None
@@ -0,0 +1,127 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import heapq
+import os
+
+# directory nodes kept at most
+NODE_BUDGET = 5000
+# pruning goes down to this share of budget, so it doesn't run on every new directory
+PRUNE_TARGET = 0.75
+# directory is reported only when none of its subdirectories has this share of its weight
+HOT_SHARE = 0.9
+
+
+class DirNode(object):
+    """Changed files (and their size) in the whole subtree."""
+    __slots__ = ('files', 'size', 'children')
+
+    def __init__(self):
+        self.files = 0
+        self.size = 0
+        self.children = None
+
+
+class HotDirs(object):
+    """
+    Prefix tree of directories with changed/new/deleted files (INFO 4/5/6).
+    Every file is counted in all of its ancestors, so memory is bounded by
+    dropping the lightest leaf directories: their files stay counted in the
+    parent, only the finer split is lost.
+
+    With size_root, files are weighted by their size (stat of size_root/path;
+    deleted files weigh nothing), otherwise every file counts as one.
+    """
+
+    def __init__(self, budget=NODE_BUDGET, size_root=None):
+        self.root = DirNode()
+        self.nodes = 1
+        self.budget = max(2, budget)
+        self.size_root = size_root
+        self.prunes = 0
+
+    def weight(self, node):
+        return node.size if self.size_root is not None else node.files
+
+    def add(self, path, kind):
+        size = 0
+        if self.size_root is not None and kind != 'deleted':
+            try:
+                size = os.lstat(os.path.join(self.size_root, path)).st_size
+            except OSError:
+                pass
+
+        node = self.root
+        node.files += 1
+        node.size += size
+        for part in path.split('/')[:-1]:
+            if not part:
+                continue
+            children = node.children
+            if children is None:
+                children = node.children = {}
+            child = children.get(part)
+            if child is None:
+                child = children[part] = DirNode()
+                self.nodes += 1
+            node = child
+            node.files += 1
+            node.size += size
+
+        if self.nodes > self.budget:
+            self.prune()
+
+    def prune(self):
+        self.prunes += 1
+        target = int(self.budget * PRUNE_TARGET)
+        while self.nodes > target:
+            # (weight, parent, name) of every leaf; parents of dropped leaves may be next round's leaves
+            leaves = []
+            stack = [self.root]
+            while stack:
+                node = stack.pop()
+                for name, child in node.children.items():
+                    if child.children:
+                        stack.append(child)
+                    else:
+                        leaves.append((self.weight(child), node, name))
+            for _, parent, name in heapq.nsmallest(self.nodes - target, leaves, key=lambda x: x[0]):
+                del parent.children[name]
+                if not parent.children:
+                    parent.children = None
+                self.nodes -= 1
+
+    def top(self, count):
+        """[(path, DirNode)] heaviest first. Directories that only pass weight of one subdirectory are skipped."""
+        res = []
+        stack = [('.', self.root)]
+        while stack:
+            path, node = stack.pop()
+            weight = self.weight(node)
+            heaviest = 0
+            if node.children:
+                for name, child in node.children.items():
+                    heaviest = max(heaviest, self.weight(child))
+                    stack.append((name if node is self.root else path + '/' + name, child))
+            if weight and heaviest < weight * HOT_SHARE:
+                res.append((path, node))
+        return heapq.nlargest(count, res, key=lambda x: self.weight(x[1]))
+
+    def report(self, count):
+        total = self.weight(self.root)
+        res = ['Hot directories (%d changed files%s):' % (
+            self.root.files, ', %.1f MB' % (self.root.size / 1048576.0) if self.size_root is not None else '')]
+        for path, node in self.top(count):
+            share = self.weight(node) * 100.0 / total if total else 0.0
+            if self.size_root is not None:
+                res.append('  %8d %10.1f MB %5.1f%%  %s' % (node.files, node.size / 1048576.0, share, path))
+            else:
+                res.append('  %8d %5.1f%%  %s' % (node.files, share, path))
+        if self.prunes:
+            res.append('  (directory budget of %d was hit %d times: small subdirectories are counted in parents)' %
+                       (self.budget, self.prunes))
+        return '\n'.join(res)
@@ -5,20 +5,83 @@ License: GPLv2+
 
 @author: dion
 """
+import threading
+import time
+
 import dbus
 from dbus.exceptions import DBusException
 
+main_loop_thread = None
+# why main loop can't run (GLib bindings missing), reported once
+main_loop_error = None
+
+
+def ensure_main_loop():
+    """
+    Run GLib main loop in a background thread (needed for async reply handlers
+    and signals). Returns False if there can't be one.
+    """
+    global main_loop_thread, main_loop_error
+    if main_loop_thread is not None:
+        return True
+    if main_loop_error is not None:
+        return False
+
+    try:
+        from dbus.mainloop.glib import DBusGMainLoop, threads_init
+        from gi.repository import GLib
+    except ImportError as e:
+        main_loop_error = e
+        print("JobViewClient: no main loop (%s), using blocking calls without suspend/cancel" % e)
+        return False
+
+    threads_init()
+    DBusGMainLoop(set_as_default=True)
+    loop = GLib.MainLoop()
+    main_loop_thread = threading.Thread(target=loop.run, name='GLibMainLoop', daemon=True)
+    main_loop_thread.start()
+    return True
+
 
 class JobViewClient(object):
     CAN_CANCEL = 0x01
     CAN_SUSPEND = 0x02
+    CAPABILITIES = CAN_CANCEL | CAN_SUSPEND
+
+    ERRORS = (DBusException,)
+    USES_SESSION_BUS = True
 
-    def __init__(self):
+    def __init__(self, async_calls=False, max_in_flight=8, stats=None):
         self.id = None
         self.session_bus = None
         self.job_iface = None
 
+        # async mode: calls are pipelined, at most max_in_flight are waiting for reply
+        self.async_calls = async_calls
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.in_flight_cond = threading.Condition()
+        self.pending_error = None
+
+        # called with 'suspend', 'resume' or 'cancel' from the main loop thread
+        self.control_handler = None
+
+        # per-call latency; timed_call replaces call only when enabled
+        self.stats = stats
+        if stats is not None:
+            self.call = self.timed_call
+
+    def set_control_handler(self, handler):
+        self.control_handler = handler
+
     def start(self, app_name, app_icon, capabilities):
+        # signals are only delivered by main loop; it must be there before the bus connection
+        if (self.async_calls or self.control_handler is not None) and not ensure_main_loop():
+            self.async_calls = False
+            self.control_handler = None
+        if self.control_handler is None:
+            # nothing would receive suspend/cancel requests
+            capabilities = 0
         self.session_bus = dbus.SessionBus()
 
         server = self.session_bus.get_object('org.kde.JobViewServer', '/JobViewServer')
@@ -33,47 +96,109 @@ class JobViewClient(object):
             raise ValueError('Unable to obtain job object')
         self.job_iface = dbus.Interface(job_object, 'org.kde.JobViewV2')
 
+        if self.control_handler is not None:
+            for signal, action in (('suspendRequested', 'suspend'), ('resumeRequested', 'resume'),
+                                   ('cancelRequested', 'cancel')):
+                self.job_iface.connect_to_signal(signal, lambda action=action: self.control_handler(action))
+
     def is_ready(self):
         return self.job_iface is not None
 
     def stop(self):
         try:
             self.terminate('')
+            self.drain()
         except DBusException:
             pass
 
         self.job_iface = None
         self.id = None
+        self.pending_error = None
+
+    def drain(self, timeout=5.0):
+        """Wait until all async calls are replied. Returns False on timeout."""
+        with self.in_flight_cond:
+            return self.in_flight_cond.wait_for(lambda: self.in_flight == 0, timeout)
+
+    def call(self, method, *args):
+        if not self.async_calls:
+            return getattr(self.job_iface, method)(*args)
+        return self.call_async(method, args, self.on_reply, self.on_error)
+
+    def timed_call(self, method, *args):
+        hist = self.stats.call_histogram(method)
+        start = time.perf_counter()
+        if not self.async_calls:
+            try:
+                return getattr(self.job_iface, method)(*args)
+            finally:
+                hist.add(time.perf_counter() - start)
+
+        def on_reply(*_):
+            hist.add(time.perf_counter() - start)
+            self.on_reply()
+
+        def on_error(error):
+            hist.add(time.perf_counter() - start)
+            self.on_error(error)
+
+        return self.call_async(method, args, on_reply, on_error)
+
+    def call_async(self, method, args, reply_handler, error_handler):
+        if self.pending_error is not None:
+            error, self.pending_error = self.pending_error, None
+            raise error
+
+        with self.in_flight_cond:
+            self.in_flight_cond.wait_for(lambda: self.in_flight < self.max_in_flight)
+            self.in_flight += 1
+        try:
+            getattr(self.job_iface, method)(*args, reply_handler=reply_handler, error_handler=error_handler)
+        except Exception:
+            self.on_reply()
+            raise
+
+    def on_reply(self, *_):
+        with self.in_flight_cond:
+            self.in_flight -= 1
+            self.in_flight_cond.notify_all()
+
+    def on_error(self, error):
+        self.pending_error = error
+        self.on_reply()
+
+    def commit(self):
+        pass
 
     def terminate(self, msg):
-        self.job_iface.terminate(msg)
+        self.call('terminate', msg)
 
     def clear_description_field(self, number):
-        return self.job_iface.clearDescriptionField(number)
+        return self.call('clearDescriptionField', number)
 
     def set_description_field(self, number, name, value):
-        return self.job_iface.setDescriptionField(number, name, value)
+        return self.call('setDescriptionField', number, name, value)
 
     def set_dest_url(self, dest_url):
-        return self.job_iface.setDestUrl(dest_url)
+        return self.call('setDestUrl', dest_url)
 
     def set_error(self, error_code):
-        return self.job_iface.setError(error_code)
+        return self.call('setError', error_code)
 
     def set_info_message(self, message):
-        return self.job_iface.setInfoMessage(message)
+        return self.call('setInfoMessage', message)
 
     def set_percent(self, percent):
-        return self.job_iface.setPercent(percent)
+        return self.call('setPercent', percent)
 
     def set_processed_amount(self, amount, unit):
-        return self.job_iface.setProcessedAmount(amount, unit)
+        return self.call('setProcessedAmount', amount, unit)
 
     def set_speed(self, bytes_per_second):
-        return self.job_iface.setSpeed(bytes_per_second)
+        return self.call('setSpeed', bytes_per_second)
 
     def set_suspended(self, suspended):
-        return self.job_iface.setSuspended(suspended)
+        return self.call('setSuspended', suspended)
 
     def set_total_amount(self, amount, unit):
-        return self.job_iface.setTotalAmount(amount, unit)
+        return self.call('setTotalAmount', amount, unit)
@@ -0,0 +1,44 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+
+
+class LineSplitter(object):
+    """
+    Splits chunks read from a pipe into lines. Keeps at most max_line bytes of
+    an unfinished line: the rest of an overlong line is dropped.
+    """
+
+    def __init__(self, max_line=65536):
+        self.max_line = max_line
+        self.partial = b''
+        self.skip_rest = False
+
+    def feed(self, data):
+        if self.skip_rest:
+            idx = data.find(b'\n')
+            if idx < 0:
+                return []
+            data = data[idx:]
+            self.skip_rest = False
+
+        if self.partial:
+            data = self.partial + data
+        lines = data.split(b'\n')
+        self.partial = lines.pop()
+
+        if len(self.partial) > self.max_line:
+            self.partial = self.partial[:self.max_line]
+            self.skip_rest = True
+        return lines
+
+    def flush(self):
+        """Returns unfinished line (at EOF), or None."""
+        res = self.partial
+        self.partial = b''
+        self.skip_rest = False
+        return res or None
@@ -0,0 +1,236 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import asyncio
+import os
+import re
+import subprocess
+import sys
+
+from duplynotify import globals
+from duplynotify.DuplyRunner import DuplyRunner, READ_CHUNK_SIZE, EXIT_GRACE_TIME
+from duplynotify.LineReader import LineSplitter
+from duplynotify.PrometheusExporter import PrometheusExporter
+
+# aggregated view refresh and child timers interval
+TICK_INTERVAL = 0.25
+
+
+def job_file_name(file_name, name):
+    """Per-backup output file: duply.prom -> duply.NAME.prom"""
+    root, ext = os.path.splitext(file_name)
+    return '%s.%s%s' % (root, re.sub(r'[^\w.-]', '_', name), ext)
+
+
+def unique_names(jobs):
+    """Same name twice (--command with the same program) gets -2, -3, ... suffix."""
+    seen = {}
+    res = []
+    for name, cmd in jobs:
+        count = seen[name] = seen.get(name, 0) + 1
+        res.append(('%s-%d' % (name, count) if count > 1 else name, cmd))
+    return res
+
+
+class ProcessHandle(object):
+    """pid and Popen-like poll() of asyncio subprocess, for DuplyRunner's throttle and /proc sampler."""
+
+    def __init__(self, proc):
+        self.proc = proc
+        self.pid = proc.pid
+
+    def poll(self):
+        return self.proc.returncode
+
+
+class ChildJob(object):
+    """One duplicity/duply command with its own DuplyRunner (and own view if child views are on)."""
+
+    def __init__(self, name, cmd, child_view):
+        self.name = name
+        self.cmd = cmd
+        self.runner = DuplyRunner(cmd, globals.notification_app_name, globals.notification_icon)
+        self.runner.title = name
+        if not child_view:
+            self.runner.backend = 'null'
+        # concurrent backups would overwrite each other's metrics
+        if globals.prom_textfile:
+            self.runner.exporter = PrometheusExporter(job_file_name(globals.prom_textfile, name))
+        if globals.timeline_json:
+            self.runner.timeline_json = job_file_name(globals.timeline_json, name)
+        self.state = 'queued'
+        self.exit_code = None
+
+    def percent(self):
+        if self.state == 'done':
+            return 100
+        if self.state == 'queued':
+            return 0
+        return self.runner.throughput.progress
+
+    def total_bytes(self):
+        throughput = self.runner.throughput
+        if self.state == 'done':
+            return throughput.changed_bytes
+        return throughput.total_bytes()
+
+    async def forward(self, stream, out):
+        """
+        Copies child output with name prefix at line starts. Reads raw chunks:
+        lines may be of any length (\r progress output never ends one).
+        """
+        prefix = ('[%s] ' % self.name).encode('utf-8', 'replace')
+        at_line_start = True
+        while True:
+            data = await stream.read(READ_CHUNK_SIZE)
+            if not data:
+                break
+            lines = data.split(b'\n')
+            res = [(prefix if at_line_start else b'') + lines[0]]
+            res.extend(prefix + line for line in lines[1:-1])
+            if len(lines) > 1:
+                res.append((prefix + lines[-1]) if lines[-1] else b'')
+            at_line_start = not lines[-1]
+            try:
+                out.buffer.write(b'\n'.join(res))
+                out.flush()
+            except OSError:
+                # our stdout is gone: keep draining so the child doesn't block
+                pass
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        runner = self.runner
+        self.state = 'running'
+        runner.begin_run()
+
+        splitter = LineSplitter()
+        log_eof = loop.create_future()
+        logfd_read, logfd_write = os.pipe()
+
+        def on_log():
+            data = os.read(logfd_read, READ_CHUNK_SIZE)
+            if data:
+                for line in splitter.feed(data):
+                    runner.handle_line(line)
+                return
+            line = splitter.flush()
+            if line is not None:
+                runner.handle_line(line)
+            loop.remove_reader(logfd_read)
+            log_eof.set_result(None)
+
+        proc = None
+        try:
+            loop.add_reader(logfd_read, on_log)
+            try:
+                proc = await asyncio.create_subprocess_exec(*(self.cmd + ['--log-fd', str(logfd_write)]),
+                                                            pass_fds=(logfd_write,), stdin=subprocess.DEVNULL,
+                                                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            finally:
+                os.close(logfd_write)
+            # no process group of its own: throttle signals duplicity's tree pid by pid
+            runner.start_process_timers(ProcessHandle(proc))
+            await asyncio.gather(self.forward(proc.stdout, sys.stdout), self.forward(proc.stderr, sys.stderr),
+                                 proc.wait())
+            # children of duplicity may hold the log pipe a bit longer
+            try:
+                await asyncio.wait_for(asyncio.shield(log_eof), EXIT_GRACE_TIME)
+            except asyncio.TimeoutError:
+                pass
+            self.exit_code = proc.returncode
+        finally:
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+            loop.remove_reader(logfd_read)
+            os.close(logfd_read)
+            self.state = 'done'
+            runner.deferred.run_all()
+            try:
+                runner.end_run(self.exit_code)
+            finally:
+                runner.finish_run()
+        return self.exit_code
+
+
+class MultiRunner(object):
+    """
+    Runs several backups concurrently (at most parallel at once) and shows
+    them as one aggregated view: mean percent, summed speed and amounts.
+    """
+
+    def __init__(self, jobs, parallel=1, child_views=False):
+        self.jobs = [ChildJob(name, cmd, child_views) for name, cmd in unique_names(jobs)]
+        self.parallel = max(1, parallel)
+        # no log of its own, only used for its notification plumbing
+        self.view = DuplyRunner([], globals.notification_app_name, globals.notification_icon)
+        self.view.exporter = None
+        if self.view.title is None:
+            self.view.title = 'backup: %s' % ', '.join(job.name for job in self.jobs)
+
+    def run(self):
+        return asyncio.run(self.run_all())
+
+    async def run_all(self):
+        limit = asyncio.Semaphore(self.parallel)
+
+        async def run_limited(job):
+            async with limit:
+                return await job.run()
+
+        self.view.check_setup_job()
+        ticker = asyncio.ensure_future(self.tick())
+        try:
+            results = await asyncio.gather(*(run_limited(job) for job in self.jobs), return_exceptions=True)
+        finally:
+            ticker.cancel()
+            self.view.invoke_handler(self.refresh, None)
+            self.view.deferred.run_all()
+            self.view.cleanup_job()
+
+        res = 0
+        for job, result in zip(self.jobs, results):
+            if isinstance(result, Exception):
+                print("%s failed: %s" % (job.name, result))
+                result = 1
+            if result and not res:
+                res = result
+        return res
+
+    async def tick(self):
+        while True:
+            timeout = TICK_INTERVAL
+            for job in self.jobs:
+                if job.state == 'running':
+                    job.runner.deferred.run_due()
+                    # throttle stops duplicity in the middle of its period
+                    due = job.runner.deferred.next_timeout()
+                    if due is not None:
+                        timeout = min(timeout, due)
+            self.view.invoke_handler(self.refresh, None)
+            self.view.deferred.run_due()
+            await asyncio.sleep(timeout)
+
+    def refresh(self, _):
+        view = self.view
+        jobs = self.jobs
+        running = [job for job in jobs if job.state == 'running']
+        done = sum(1 for job in jobs if job.state == 'done')
+
+        changed_bytes = sum(job.runner.throughput.changed_bytes for job in jobs)
+        totals = [job.total_bytes() for job in jobs]
+        total_bytes = None if None in totals else sum(totals)
+
+        _, unit = view.format_size(changed_bytes if total_bytes is None else total_bytes)
+        view.job.set_percent(sum(job.percent() for job in jobs) // len(jobs))
+        view.job.set_speed(sum(job.runner.throughput.speed() for job in running))
+        view.job.set_processed_amount(int(view.scale_size(changed_bytes, unit)), unit)
+        if total_bytes is not None:
+            view.job.set_total_amount(int(view.scale_size(total_bytes, unit)), unit)
+
+        view.set_status('%d running, %d queued, %d done' % (len(running), len(jobs) - len(running) - done, done))
+        view.set_file_name(', '.join('%s %d%%' % (job.name, job.percent()) for job in running))
@@ -0,0 +1,73 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import time
+
+import dbus
+from dbus.exceptions import DBusException
+
+from duplynotify.TextClient import TextClient
+
+
+class NotifyClient(TextClient):
+    """org.freedesktop.Notifications backend: one notification replaced in place."""
+    ERRORS = (DBusException,)
+    USES_SESSION_BUS = True
+
+    def __init__(self, stats=None):
+        TextClient.__init__(self, stats)
+        self.stats = stats
+        self.app_name = None
+        self.app_icon = None
+        self.iface = None
+        self.id = 0
+        self.last_shown = None
+
+    def start(self, app_name, app_icon, capabilities):
+        self.app_name = app_name
+        self.app_icon = app_icon
+        session_bus = dbus.SessionBus()
+        server = session_bus.get_object('org.freedesktop.Notifications', '/org/freedesktop/Notifications')
+        self.iface = dbus.Interface(server, 'org.freedesktop.Notifications')
+        self.id = 0
+        self.last_shown = None
+        TextClient.start(self, app_name, app_icon, capabilities)
+
+    def stop(self):
+        try:
+            if self.id:
+                self.iface.CloseNotification(self.id)
+        except DBusException:
+            pass
+        self.iface = None
+        self.id = 0
+        TextClient.stop(self)
+
+    def terminate(self, msg):
+        if msg:
+            self.fields[0] = ('status', msg)
+        self.commit()
+
+    def commit(self):
+        summary = self.info_message or self.app_name
+        body = [self.format_progress()] + self.format_fields()
+        body = '\n'.join(x for x in body if x)
+        hints = {}
+        if self.percent is not None:
+            hints['value'] = dbus.Int32(self.percent)
+
+        shown = (summary, body, self.percent)
+        if shown == self.last_shown:
+            return
+
+        start = time.perf_counter()
+        self.id = self.iface.Notify(self.app_name, dbus.UInt32(self.id), self.app_icon, summary, body,
+                                    dbus.Array([], signature='s'), dbus.Dictionary(hints, signature='sv'),
+                                    dbus.Int32(0))
+        if self.stats is not None:
+            self.stats.call_histogram('Notify').add(time.perf_counter() - start)
+        self.last_shown = shown
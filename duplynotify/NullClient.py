@@ -0,0 +1,69 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+
+
+class NullClient(object):
+    """Notification sink that drops everything (headless runs, log analysis)."""
+    ERRORS = ()
+    USES_SESSION_BUS = False
+    # JobView CAN_CANCEL/CAN_SUSPEND; set_control_handler is never called back without them
+    CAPABILITIES = 0
+
+    def __init__(self, stats=None):
+        self.ready = False
+
+    def set_control_handler(self, handler):
+        pass
+
+    def start(self, app_name, app_icon, capabilities):
+        self.ready = True
+
+    def is_ready(self):
+        return self.ready
+
+    def stop(self):
+        self.ready = False
+
+    def terminate(self, msg):
+        pass
+
+    def drain(self, timeout=5.0):
+        return True
+
+    def commit(self):
+        pass
+
+    def clear_description_field(self, number):
+        pass
+
+    def set_description_field(self, number, name, value):
+        pass
+
+    def set_dest_url(self, dest_url):
+        pass
+
+    def set_error(self, error_code):
+        pass
+
+    def set_info_message(self, message):
+        pass
+
+    def set_percent(self, percent):
+        pass
+
+    def set_processed_amount(self, amount, unit):
+        pass
+
+    def set_speed(self, bytes_per_second):
+        pass
+
+    def set_suspended(self, suspended):
+        pass
+
+    def set_total_amount(self, amount, unit):
+        pass
@@ -0,0 +1,157 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import json
+import time
+
+# event -> phase it switches to
+TRANSITIONS = {
+    'sync': 'sync',
+    'collection': 'collection',
+    'startup': 'scan',
+    'diff_file': 'scan',
+    'write_gpg': 'gpg',
+    'par2': 'par2',
+    'upload_begin': 'upload',
+    # duplicity goes on reading files for the next volume
+    'upload_done': 'scan',
+    'finish': None,
+}
+
+# what a phase dominating wall time usually means
+BOUND_BY = {
+    'sync': 'network (metadata sync)',
+    'collection': 'local cache / collection status',
+    'scan': 'I/O (scanning files)',
+    'gpg': 'CPU (gpg)',
+    'par2': 'CPU (par2)',
+    'upload': 'network (upload)',
+    'suspended': 'user (suspended from notification)',
+}
+
+# phases whose time is counted against a volume
+VOLUME_PHASES = ('scan', 'gpg', 'par2', 'upload')
+
+
+class PhaseTimeline(object):
+    """
+    Phase state machine driven by DuplyRunner handlers. Records wall-clock time
+    per phase and per volume.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.start = clock()
+        self.end = None
+
+        self.phase = None
+        self.phase_since = None
+        # phase to go back to on resume
+        self.suspended_phase = None
+        self.totals = {}
+        self.transitions = 0
+
+        # [{'name': ..., 'phases': {phase: seconds}}], volume being built is last
+        self.volumes = []
+        self.volume_open = False
+        # volume phase time since last volume was done: belongs to the next volume if one is
+        # written, otherwise it's the tail of the run (after the last upload)
+        self.unassigned = {}
+
+    def event(self, name, volume_name=None):
+        # time of the phase that ends now belongs to the current volume
+        self.enter(TRANSITIONS[name])
+
+        if name == 'write_gpg':
+            self.volumes.append({'name': volume_name, 'phases': self.unassigned})
+            self.unassigned = {}
+            self.volume_open = True
+        elif name == 'upload_done':
+            self.volume_open = False
+
+    def suspend(self):
+        if self.phase != 'suspended':
+            self.suspended_phase = self.phase
+            self.enter('suspended')
+
+    def resume(self):
+        if self.phase == 'suspended':
+            self.enter(self.suspended_phase)
+
+    def enter(self, phase):
+        if phase == self.phase:
+            return
+        now = self.clock()
+        if self.phase is not None:
+            self.account(self.phase, now - self.phase_since)
+        self.phase = phase
+        self.phase_since = now
+        self.transitions += 1
+
+    def account(self, phase, seconds):
+        self.totals[phase] = self.totals.get(phase, 0.0) + seconds
+        if phase not in VOLUME_PHASES:
+            return
+        phases = self.volumes[-1]['phases'] if self.volume_open else self.unassigned
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def finish(self):
+        self.event('finish')
+        self.end = self.clock()
+
+    def phase_totals(self):
+        """Totals including the phase in progress."""
+        res = dict(self.totals)
+        if self.phase is not None:
+            res[self.phase] = res.get(self.phase, 0.0) + self.clock() - self.phase_since
+        return res
+
+    def duration(self):
+        return (self.end if self.end is not None else self.clock()) - self.start
+
+    def bottleneck(self):
+        totals = self.phase_totals()
+        if not totals:
+            return None
+        return max(totals, key=totals.get)
+
+    def to_dict(self):
+        return {
+            'duration': self.duration(),
+            'phases': self.phase_totals(),
+            'bottleneck': self.bottleneck(),
+            'volumes': [{'index': idx + 1, 'name': vol['name'], 'phases': vol['phases']}
+                        for idx, vol in enumerate(self.volumes)],
+            'tail': self.unassigned or None,
+        }
+
+    def save_json(self, file_name):
+        with open(file_name, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
+
+    def report(self):
+        duration = self.duration()
+        res = ['Phase timeline (%.1f s):' % duration]
+        for phase, seconds in sorted(self.phase_totals().items(), key=lambda x: -x[1]):
+            share = seconds * 100.0 / duration if duration else 0.0
+            res.append('  %-12s %10.1f s %5.1f%%' % (phase, seconds, share))
+
+        if self.volumes or self.unassigned:
+            res.append('Volumes:')
+            res.append('  %-6s' % '#' + ''.join('%10s' % p for p in VOLUME_PHASES))
+            for idx, vol in enumerate(self.volumes):
+                res.append('  %-6d' % (idx + 1) + ''.join('%10.1f' % vol['phases'].get(p, 0.0)
+                                                        for p in VOLUME_PHASES))
+            if self.unassigned:
+                # after the last volume (or before the first one if nothing was written)
+                res.append('  %-6s' % 'tail' + ''.join('%10.1f' % self.unassigned.get(p, 0.0)
+                                                       for p in VOLUME_PHASES))
+
+        bottleneck = self.bottleneck()
+        if bottleneck:
+            res.append('Mostly bound by: %s' % BOUND_BY.get(bottleneck, bottleneck))
+        return '\n'.join(res)
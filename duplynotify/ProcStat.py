@@ -0,0 +1,189 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+
+/proc readers for duplicity process tree (Linux only): CPU time from
+/proc/<pid>/stat, I/O counters from /proc/<pid>/io.
+"""
+import os
+import time
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+class ProcSample(object):
+    """Cumulative counters of one process. cpu_time in seconds, rest in bytes."""
+    __slots__ = ('pid', 'name', 'cpu_time', 'read_bytes', 'write_bytes', 'rchar', 'wchar')
+
+    def __init__(self, pid, name, cpu_time, read_bytes, write_bytes, rchar, wchar):
+        self.pid = pid
+        self.name = name
+        self.cpu_time = cpu_time
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+        self.rchar = rchar
+        self.wchar = wchar
+
+
+class ProcRates(object):
+    """Per-second rates between two samples. cpu is percent of one core."""
+    __slots__ = ('pid', 'name', 'cpu', 'read_bytes', 'write_bytes', 'rchar', 'wchar')
+
+    def __init__(self, pid, name, cpu, read_bytes, write_bytes, rchar, wchar):
+        self.pid = pid
+        self.name = name
+        self.cpu = cpu
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+        self.rchar = rchar
+        self.wchar = wchar
+
+
+def read_stat(pid):
+    """Returns (comm, ppid, cpu seconds). Raises OSError if process is gone."""
+    with open('/proc/%d/stat' % pid, 'rb') as f:
+        data = f.read()
+    # comm may contain spaces and parentheses
+    start = data.find(b'(')
+    end = data.rfind(b')')
+    fields = data[end + 2:].split()
+    # fields[0] is state: ppid is field 4 of stat(5), utime/stime are 14/15
+    return (data[start + 1:end].decode('utf-8', 'replace'), int(fields[1]),
+            (int(fields[11]) + int(fields[12])) / float(CLOCK_TICKS))
+
+
+def read_io(pid):
+    """/proc/<pid>/io as dict, empty if not permitted (other user, no CONFIG_TASK_IO_ACCOUNTING)."""
+    res = {}
+    try:
+        with open('/proc/%d/io' % pid, 'rb') as f:
+            for line in f:
+                name, _, value = line.partition(b':')
+                res[name] = int(value)
+    except PermissionError:
+        pass
+    return res
+
+
+def sample_process(pid):
+    """ProcSample or None if process is gone."""
+    try:
+        name, _, cpu_time = read_stat(pid)
+        io = read_io(pid)
+    except (OSError, ValueError, IndexError):
+        return None
+    return ProcSample(pid, name, cpu_time, io.get(b'read_bytes', 0), io.get(b'write_bytes', 0),
+                      io.get(b'rchar', 0), io.get(b'wchar', 0))
+
+
+def has_children_files():
+    """/proc/<pid>/task/<tid>/children needs CONFIG_PROC_CHILDREN."""
+    return os.path.exists('/proc/self/task/%d/children' % os.getpid())
+
+
+def child_pids(pid):
+    """Direct children from /proc/<pid>/task/*/children."""
+    res = []
+    try:
+        tasks = os.listdir('/proc/%d/task' % pid)
+    except OSError:
+        return res
+    for tid in tasks:
+        try:
+            with open('/proc/%d/task/%s/children' % (pid, tid), 'rb') as f:
+                res.extend(int(x) for x in f.read().split())
+        except OSError:
+            # task just exited
+            pass
+    return res
+
+
+def scan_children():
+    """ppid -> [pid] of all processes."""
+    res = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            res.setdefault(read_stat(int(name))[1], []).append(int(name))
+        except (OSError, ValueError, IndexError):
+            pass
+    return res
+
+
+def process_tree(root_pid, use_children_files=None):
+    """root_pid and all its descendants."""
+    if use_children_files is None:
+        use_children_files = has_children_files()
+    if use_children_files:
+        get_children = child_pids
+    else:
+        get_children = scan_children().get
+
+    res = [root_pid]
+    idx = 0
+    while idx < len(res):
+        res.extend(get_children(res[idx]) or ())
+        idx += 1
+    return res
+
+
+class TreeSampler(object):
+    """
+    Samples duplicity process tree and turns cumulative counters into rates
+    between consecutive calls of sample().
+    """
+
+    def __init__(self, root_pid, clock=time.monotonic):
+        self.root_pid = root_pid
+        self.clock = clock
+        self.prev = {}
+        self.prev_time = None
+        self.use_children_files = has_children_files()
+
+    def sample(self):
+        """Returns [ProcRates] of live processes (empty on the first call)."""
+        now = self.clock()
+        current = {}
+        for pid in process_tree(self.root_pid, self.use_children_files):
+            proc = sample_process(pid)
+            if proc is not None:
+                current[pid] = proc
+
+        res = []
+        if self.prev_time is not None and now > self.prev_time:
+            dt = now - self.prev_time
+            for pid, proc in current.items():
+                # process started since last sample: all of its counters are new
+                old = self.prev.get(pid)
+                if old is None or old.name != proc.name:
+                    old = ProcSample(pid, proc.name, 0, 0, 0, 0, 0)
+                res.append(ProcRates(pid, proc.name, (proc.cpu_time - old.cpu_time) * 100.0 / dt,
+                                     (proc.read_bytes - old.read_bytes) / dt,
+                                     (proc.write_bytes - old.write_bytes) / dt,
+                                     (proc.rchar - old.rchar) / dt, (proc.wchar - old.wchar) / dt))
+        self.prev = current
+        self.prev_time = now
+        return res
+
+
+def rates_by_name(rates):
+    """name -> ProcRates summed over processes of that name (e.g. several gpg)."""
+    groups = {}
+    for proc in rates:
+        groups.setdefault(proc.name, []).append(proc)
+    return dict((name, total_rates(procs, name)) for name, procs in groups.items())
+
+
+def total_rates(rates, name='total'):
+    res = ProcRates(None, name, 0.0, 0.0, 0.0, 0.0, 0.0)
+    for proc in rates:
+        res.cpu += proc.cpu
+        res.read_bytes += proc.read_bytes
+        res.write_bytes += proc.write_bytes
+        res.rchar += proc.rchar
+        res.wchar += proc.wchar
+    return res
@@ -0,0 +1,70 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import os
+import tempfile
+
+PREFIX = 'duply_notify_'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class PrometheusExporter(object):
+    """Writes node_exporter textfile collector file for one backup run."""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+
+    def format(self, backup_name, metrics, throughput, timeline):
+        labels = 'backup="%s"' % escape_label(backup_name or 'unknown')
+        res = []
+
+        def add(name, kind, help_text, value, extra_labels=None):
+            if not any(line.startswith('# TYPE %s%s ' % (PREFIX, name)) for line in res):
+                res.append('# HELP %s%s %s' % (PREFIX, name, help_text))
+                res.append('# TYPE %s%s %s' % (PREFIX, name, kind))
+            label_str = labels if extra_labels is None else labels + ',' + extra_labels
+            res.append('%s%s{%s} %s' % (PREFIX, name, label_str, value))
+
+        running = metrics.exit_code is None
+        add('running', 'gauge', 'Whether the backup is still running.', 1 if running else 0)
+        add('start_time_seconds', 'gauge', 'Backup start time (unix).', '%.3f' % metrics.start_time)
+        add('duration_seconds', 'gauge', 'Backup wall-clock duration.', '%.3f' % metrics.duration())
+        if not running:
+            add('exit_code', 'gauge', 'duplicity exit code.', metrics.exit_code)
+            add('end_time_seconds', 'gauge', 'Backup end time (unix).', '%.3f' % metrics.end_time)
+
+        add('changed_bytes', 'gauge', 'Bytes changed as reported by duplicity.', throughput.changed_bytes)
+        add('upload_speed_average_bytes', 'gauge', 'Average upload speed excluding stalls (bytes/s).',
+            '%.1f' % throughput.average_speed())
+        add('upload_speed_peak_bytes', 'gauge', 'Peak upload speed (bytes/s).', throughput.peak_speed)
+        add('stall_seconds', 'gauge', 'Time upload was stalled.', throughput.total_stall_time())
+        add('stalls', 'gauge', 'Number of upload stall episodes.', throughput.stall_count)
+        add('volumes', 'gauge', 'Volumes written.', metrics.volumes)
+        add('uploads', 'gauge', 'Volumes uploaded.', metrics.uploads)
+
+        for phase, seconds in sorted(timeline.phase_totals().items()):
+            add('phase_duration_seconds', 'gauge', 'Wall-clock time spent per phase.', '%.3f' % seconds,
+                'phase="%s"' % escape_label(phase))
+
+        return '\n'.join(res) + '\n'
+
+    def write(self, backup_name, metrics, throughput, timeline):
+        """Atomic: node_exporter never sees a half written file."""
+        text = self.format(backup_name, metrics, throughput, timeline)
+        dir_name = os.path.dirname(os.path.abspath(self.file_name))
+        fd, tmp_name = tempfile.mkstemp(prefix='.duply_notify.', suffix='.prom.tmp', dir=dir_name)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+            os.chmod(tmp_name, 0o644)
+            os.replace(tmp_name, self.file_name)
+        except Exception:
+            os.unlink(tmp_name)
+            raise
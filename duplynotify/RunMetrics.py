@@ -0,0 +1,30 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import time
+
+
+class RunMetrics(object):
+    """Per-run counters collected by DuplyRunner handlers."""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.start_time = time.time()
+        self.start_clock = clock()
+        self.end_time = None
+        self.exit_code = None
+
+        self.files = 0
+        self.volumes = 0
+        self.uploads = 0
+
+    def duration(self):
+        return self.clock() - self.start_clock
+
+    def finish(self, exit_code):
+        self.exit_code = exit_code
+        self.end_time = time.time()
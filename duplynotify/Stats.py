@@ -0,0 +1,80 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import threading
+
+BUCKET_COUNT = 40
+
+HISTOGRAM_HEADER = '  %-24s %8s %9s %9s %9s %9s %9s' % ('', 'count', 'total ms', 'avg ms', 'p50 ms', 'p99 ms', 'max ms')
+
+
+class LatencyHistogram(object):
+    """Counts latencies in power-of-two microsecond buckets."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * BUCKET_COUNT
+
+    def add(self, seconds):
+        idx = min(int(seconds * 1000000).bit_length(), BUCKET_COUNT - 1)
+        with self.lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            self.buckets[idx] += 1
+
+    def percentile(self, pct):
+        """Upper bound (seconds) of bucket holding given percentile."""
+        if not self.count:
+            return 0.0
+        limit = self.count * pct / 100.0
+        seen = 0
+        for idx, value in enumerate(self.buckets):
+            seen += value
+            if seen >= limit:
+                return min((1 << idx) / 1000000.0, self.max)
+        return self.max
+
+    def format(self, name):
+        avg = self.total / self.count if self.count else 0.0
+        return '  %-24s %8d %9.3f %9.3f %9.3f %9.3f %9.3f' % (
+            name, self.count, self.total * 1000, avg * 1000,
+            self.percentile(50) * 1000, self.percentile(99) * 1000, self.max * 1000)
+
+
+class Stats(object):
+    """DBus call latencies and line-to-notification lag."""
+
+    def __init__(self):
+        self.calls = {}
+        self.lag = LatencyHistogram()
+
+    def call_histogram(self, method):
+        res = self.calls.get(method)
+        if res is None:
+            res = self.calls.setdefault(method, LatencyHistogram())
+        return res
+
+    def summary(self):
+        res = ['DBus calls:', HISTOGRAM_HEADER]
+        total = LatencyHistogram()
+        for name in sorted(self.calls):
+            hist = self.calls[name]
+            res.append(hist.format(name))
+            total.count += hist.count
+            total.total += hist.total
+            total.max = max(total.max, hist.max)
+            total.buckets = [a + b for a, b in zip(total.buckets, hist.buckets)]
+        res.append(total.format('(all)'))
+        res.append('Line lag (arrival -> handler done):')
+        res.append(HISTOGRAM_HEADER)
+        res.append(self.lag.format('handled lines'))
+        return '\n'.join(res)
@@ -0,0 +1,87 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import sys
+import threading
+import time
+
+from duplynotify.TextClient import TextClient
+
+# never redraw more often than this
+MIN_REDRAW_INTERVAL = 0.25
+
+
+class TerminalClient(TextClient):
+    """Single progress line on stderr, redrawn only when its text changes."""
+
+    def __init__(self, stats=None, out=None):
+        TextClient.__init__(self, stats)
+        self.out = out if out is not None else sys.stderr
+        self.is_tty = self.out.isatty()
+        self.last_line = None
+        self.last_draw = 0.0
+        self.width = 0
+        # commit() may also come from redraw timer thread
+        self.lock = threading.Lock()
+        self.redraw_timer = None
+
+    def format_line(self):
+        parts = [self.info_message] if self.info_message else []
+        progress = self.format_progress()
+        if progress:
+            parts.append(progress)
+        parts.extend(self.format_fields())
+        return ' | '.join(parts)
+
+    def commit(self, force=False):
+        with self.lock:
+            line = self.format_line()
+            if line == self.last_line:
+                return
+            wait = self.last_draw + MIN_REDRAW_INTERVAL - time.monotonic()
+            if not force and wait > 0:
+                # trailing redraw: the skipped update is shown even if nothing else comes
+                if self.redraw_timer is None:
+                    self.redraw_timer = threading.Timer(wait, self.redraw)
+                    self.redraw_timer.daemon = True
+                    self.redraw_timer.start()
+                return
+            self.last_line = line
+            self.last_draw = time.monotonic()
+            if self.is_tty:
+                self.out.write('\r%s%s' % (line, ' ' * max(0, self.width - len(line))))
+                self.width = len(line)
+            else:
+                self.out.write(line + '\n')
+            self.out.flush()
+
+    def redraw(self):
+        with self.lock:
+            self.redraw_timer = None
+        self.commit()
+
+    def drain(self, timeout=5.0):
+        # last update may be waiting for redraw timer
+        self.commit(force=True)
+        return True
+
+    def terminate(self, msg):
+        if msg:
+            self.fields[0] = ('status', msg)
+        self.commit(force=True)
+
+    def stop(self):
+        self.commit(force=True)
+        with self.lock:
+            if self.redraw_timer is not None:
+                self.redraw_timer.cancel()
+                self.redraw_timer = None
+        if self.is_tty and self.width:
+            self.out.write('\n')
+            self.out.flush()
+        self.width = 0
+        TextClient.stop(self)
@@ -0,0 +1,67 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+from duplynotify.NullClient import NullClient
+
+
+class TextClient(NullClient):
+    """
+    Base for backends that render the whole job as text. set_* only update
+    state, commit() is called once per batch of updates to redraw.
+    """
+
+    def __init__(self, stats=None):
+        NullClient.__init__(self, stats)
+        self.info_message = ''
+        self.fields = {}
+        self.percent = None
+        self.speed = None
+        self.processed = None
+        self.total = None
+        self.suspended = False
+
+    def clear_description_field(self, number):
+        self.fields.pop(number, None)
+
+    def set_description_field(self, number, name, value):
+        self.fields[number] = (name, value)
+
+    def set_info_message(self, message):
+        self.info_message = message
+
+    def set_percent(self, percent):
+        self.percent = percent
+
+    def set_processed_amount(self, amount, unit):
+        self.processed = (amount, unit)
+
+    def set_speed(self, bytes_per_second):
+        self.speed = bytes_per_second
+
+    def set_suspended(self, suspended):
+        self.suspended = suspended
+
+    def set_total_amount(self, amount, unit):
+        self.total = (amount, unit)
+
+    def format_progress(self):
+        res = []
+        if self.percent is not None:
+            res.append('%d%%' % self.percent)
+        if self.processed is not None:
+            amount = '%d %s' % self.processed
+            if self.total is not None:
+                amount += ' of %d %s' % self.total
+            res.append(amount)
+        if self.speed:
+            res.append('%.1f KB/s' % (self.speed / 1024.0))
+        if self.suspended:
+            res.append('suspended')
+        return ', '.join(res)
+
+    def format_fields(self):
+        return ['%s: %s' % self.fields[idx] for idx in sorted(self.fields) if self.fields[idx][1]]
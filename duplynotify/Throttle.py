@@ -0,0 +1,87 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+from duplynotify.ProcStat import total_rates
+
+# one run + stop cycle, seconds
+DUTY_PERIOD = 1.0
+# never stop duplicity for the whole period (it would never make progress to measure)
+MIN_DUTY = 0.05
+# how fast duty follows the measured rate (1 - jump straight to the new value)
+DUTY_GAIN = 0.5
+
+
+class Throttle(object):
+    """
+    Duty-cycle controller: duplicity process tree runs for duty * period
+    and is stopped for the rest of every period. Duty is adjusted after each
+    period so the process tree stays under every target:
+
+        read    disk read bytes/s (/proc/<pid>/io read_bytes)
+        cpu     percent of one core
+        upload  bytes/s written (wchar) while in upload phase
+
+    Rates measured over a period are duty * unthrottled rate, so the
+    unthrottled rate is estimated as measured / duty.
+    """
+
+    def __init__(self, sampler, read=None, cpu=None, upload=None, period=DUTY_PERIOD, min_duty=MIN_DUTY):
+        self.sampler = sampler
+        self.targets = {}
+        if read:
+            self.targets['read'] = read
+        if cpu:
+            self.targets['cpu'] = cpu
+        if upload:
+            self.targets['upload'] = upload
+        self.period = period
+        self.min_duty = min_duty
+
+        self.duty = 1.0
+        # target currently holding duty down, None if running freely
+        self.limited_by = None
+        self.last_rates = None
+
+    def measure(self, rates, phase):
+        total = total_rates(rates)
+        res = {
+            'read': total.read_bytes,
+            'cpu': total.cpu,
+        }
+        if phase == 'upload':
+            res['upload'] = total.wchar
+        return res
+
+    def update(self, rates, phase):
+        """Feed rates of the period that just ended. Returns duty for the next one."""
+        measured = self.measure(rates, phase)
+        self.last_rates = measured
+
+        wanted = 1.0
+        limited_by = None
+        for name, target in self.targets.items():
+            value = measured.get(name)
+            if not value:
+                continue
+            duty = target * self.duty / value
+            if duty < wanted:
+                wanted = duty
+                limited_by = name
+
+        self.duty += DUTY_GAIN * (wanted - self.duty)
+        self.duty = max(self.min_duty, min(1.0, self.duty))
+        if self.duty > 0.99:
+            self.duty = 1.0
+        self.limited_by = limited_by if self.duty < 1.0 else None
+        return self.duty
+
+    def describe(self):
+        """Short throttle state for notification status, None while not throttling."""
+        if self.limited_by is None:
+            return None
+        # rounded so status isn't resent every period
+        return 'throttled to %d%% by %s' % (int(self.duty * 20 + 0.5) * 5, self.limited_by)
@@ -0,0 +1,129 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import math
+
+# EWMA time constant, seconds of duplicity elapsed time
+EWMA_TAU = 10.0
+# speed samples kept for percentile
+WINDOW_SIZE = 64
+
+
+class ThroughputAnalyzer(object):
+    """
+    Rolling statistics over NOTICE 16 progress records in constant memory:
+    smoothed speed (EWMA and windowed percentile), stall episodes and own
+    estimate of total size and ETA.
+    """
+
+    def __init__(self, tau=EWMA_TAU, window_size=WINDOW_SIZE):
+        self.tau = tau
+        self.window = [0] * window_size
+        self.window_len = 0
+        self.window_pos = 0
+
+        self.samples = 0
+        self.ewma_speed = None
+        self.peak_speed = 0
+        self.last_elapsed = None
+
+        self.changed_bytes = 0
+        self.elapsed = 0
+        self.progress = 0
+        self.stalled = False
+        self.total_estimate = None
+
+        self.stall_count = 0
+        self.stall_time = 0
+        self.stall_started = None
+
+        # duplicity elapsed time is wall clock; time it was suspended doesn't count
+        self.paused_time = 0
+
+    def add_paused(self, seconds):
+        self.paused_time += seconds
+
+    def update(self, changed_bytes, elapsed, progress, speed, stalled):
+        elapsed -= self.paused_time
+        dt = elapsed - self.last_elapsed if self.last_elapsed is not None else 0
+        self.last_elapsed = elapsed
+        self.changed_bytes = changed_bytes
+        self.elapsed = elapsed
+        self.progress = progress
+
+        if stalled:
+            if not self.stalled:
+                self.stall_count += 1
+                self.stall_started = elapsed
+            self.stalled = True
+            return
+        if self.stalled:
+            self.stall_time += elapsed - self.stall_started
+            self.stall_started = None
+            self.stalled = False
+
+        self.samples += 1
+        self.peak_speed = max(self.peak_speed, speed)
+        alpha = 1.0 - math.exp(-max(dt, 1) / self.tau)
+        if self.ewma_speed is None:
+            self.ewma_speed = float(speed)
+        else:
+            self.ewma_speed += alpha * (speed - self.ewma_speed)
+
+        self.window[self.window_pos] = speed
+        self.window_pos = (self.window_pos + 1) % len(self.window)
+        self.window_len = min(self.window_len + 1, len(self.window))
+
+        if progress > 0:
+            estimate = changed_bytes * 100.0 / progress
+            if self.total_estimate is None:
+                self.total_estimate = estimate
+            else:
+                self.total_estimate += alpha * (estimate - self.total_estimate)
+
+    def speed(self):
+        """Smoothed speed, 0 while stalled."""
+        if self.stalled or self.ewma_speed is None:
+            return 0
+        return int(self.ewma_speed)
+
+    def speed_percentile(self, pct):
+        if not self.window_len:
+            return 0
+        values = sorted(self.window[:self.window_len])
+        return values[min(self.window_len - 1, int(self.window_len * pct / 100.0))]
+
+    def average_speed(self):
+        """Changed bytes over elapsed time, excluding stalls."""
+        active = self.elapsed - self.total_stall_time()
+        if active <= 0:
+            return 0
+        return self.changed_bytes / active
+
+    def total_stall_time(self):
+        if self.stall_started is not None:
+            return self.stall_time + self.elapsed - self.stall_started
+        return self.stall_time
+
+    def total_bytes(self):
+        if self.total_estimate is None:
+            return None
+        return max(int(self.total_estimate), self.changed_bytes)
+
+    def eta(self):
+        """Seconds left, None when unknown."""
+        total = self.total_bytes()
+        rate = self.average_speed()
+        if total is None or not rate:
+            return None
+        return max(0, int((total - self.changed_bytes) / rate))
+
+    def summary(self):
+        return ('throughput: avg %.1f KB/s, ewma %.1f KB/s, p50 %.1f KB/s, p90 %.1f KB/s, peak %.1f KB/s, '
+                'stalls %d (%d s)' % (self.average_speed() / 1024.0, self.speed() / 1024.0,
+                                      self.speed_percentile(50) / 1024.0, self.speed_percentile(90) / 1024.0,
+                                      self.peak_speed / 1024.0, self.stall_count, self.total_stall_time()))
@@ -6,45 +6,104 @@ License: GPLv2+
 @author: dion
 """
 
-import re
 import time
 
-from duplynotify import globals
-
-TIMESTAMP_RE = re.compile(r'^\[([\d\.]+)\] (.*)$')
+from duplynotify.Stats import LatencyHistogram, HISTOGRAM_HEADER
 
 
 class TimedReader(object):
+    """
+    Replays capture records at their original pace. Every record gets an
+    absolute deadline on the monotonic clock:
+
+        start + (capture time since first record - compressed gaps) / speed
+
+    so time spent handling lines between reads doesn't add up as drift.
 
-    def __init__(self, f_obj):
+    speed       None replays as fast as lines are handled (no sleeping)
+    max_gap     longest wait between two records in replay seconds,
+                longer gaps are shortened to it (None - keep every gap)
+    sleep       called with seconds to wait, lets caller run its timers meanwhile
+    """
+
+    def __init__(self, f_obj, speed=1.0, max_gap=None, clock=time.monotonic, sleep=time.sleep):
         self.f_obj = f_obj
+        self.speed = speed
+        self.max_gap = max_gap
+        self.clock = clock
+        self.sleep = sleep
+
         self.prev_time = None
+        self.start = None
+        # capture seconds since first record, without compressed gaps
+        self.offset = 0.0
+        self.compressed = 0.0
+        self.compressed_gaps = 0
+
+        self.lines = 0
+        self.last_deadline = None
+        self.last_read = None
+        # how late records were handed out compared to their deadline
+        self.lateness = LatencyHistogram()
+
+    def schedule(self, msg_time):
+        """Deadline (clock time) of record captured at msg_time."""
+        if self.prev_time is None:
+            self.start = self.clock()
+        else:
+            # capture clock stepped back: no wait
+            gap = max(0.0, msg_time - self.prev_time)
+            if self.max_gap is not None and gap > self.max_gap * self.speed:
+                self.compressed += gap - self.max_gap * self.speed
+                self.compressed_gaps += 1
+                gap = self.max_gap * self.speed
+            self.offset += gap
+        self.prev_time = msg_time
+        return self.start + self.offset / self.speed
 
     def readline(self):
-        res = self.f_obj.readline()
-        if res is None:
-            return res
+        record = self.f_obj.read_record()
+        if record is None:
+            return b''
 
-        m = TIMESTAMP_RE.match(res)
-        if not m:
-            return res
+        msg_time, res = record
+        self.lines += 1
+        if msg_time is None or self.speed is None:
+            self.last_read = self.clock()
+            if self.start is None:
+                self.start = self.last_read
+            return res or b" "
 
-        msg_time = float(m.group(1))
-        res = m.group(2)
+        deadline = self.schedule(msg_time)
+        now = self.clock()
+        if deadline > now:
+            self.sleep(deadline - now)
+            now = self.clock()
+        self.lateness.add(now - deadline if now > deadline else 0.0)
+        self.last_deadline = deadline
+        self.last_read = now
 
-        # sleep a bit if needed
-        if self.prev_time is not None:
-            delta = msg_time - self.prev_time
-            sleep_time = delta / globals.replay_log_speed
-            if sleep_time > 1 or sleep_time < 0:
-                sleep_time = 1.0
-            time.sleep(sleep_time)
+        return res or b" "
 
-        self.prev_time = msg_time
+    def report(self):
+        """Scheduled vs actual replay timing."""
+        if self.start is None:
+            return 'Replay: no records'
+        took = self.last_read - self.start
+        if self.speed is None or self.last_deadline is None:
+            return 'Replay: %d lines in %.3f s (%.0f lines/s), unthrottled' % (
+                self.lines, took, self.lines / took if took > 0 else 0.0)
 
-        if res == "":
-            return " "
-        return res
+        scheduled = self.last_deadline - self.start
+        res = ['Replay: %d lines at %gx, scheduled %.3f s, took %.3f s (drift %+.3f s)' % (
+            self.lines, self.speed, scheduled, took, took - scheduled)]
+        if self.compressed_gaps:
+            res.append('  %d gaps over %g s shortened by %.1f s of capture time' % (
+                self.compressed_gaps, self.max_gap, self.compressed))
+        res.append('Lateness (deadline -> line read):')
+        res.append(HISTOGRAM_HEADER)
+        res.append(self.lateness.format('replayed lines'))
+        return '\n'.join(res)
 
     def close(self):
         self.f_obj.close()
@@ -0,0 +1,159 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import threading
+
+
+class UpdateScheduler(object):
+    """
+    Coalescing front-end for JobViewClient.
+
+    Keeps the latest desired value of every JobView field and sends only the
+    fields that changed since the last flush. With a positive rate flushing is
+    done by a background thread, so the log reader never waits for DBus.
+    Errors raised by the flush thread are re-raised on the next update call.
+    """
+
+    def __init__(self, client, rate):
+        self.client = client
+        self.ERRORS = client.ERRORS
+        self.USES_SESSION_BUS = client.USES_SESSION_BUS
+        self.CAPABILITIES = client.CAPABILITIES
+        self.interval = 1.0 / rate if rate > 0 else 0
+
+        # guards desired/sent/dirty
+        self.lock = threading.Lock()
+        # serializes all calls into client
+        self.client_lock = threading.RLock()
+
+        self.desired = {}
+        self.sent = {}
+        self.dirty = {}
+        self.pending_error = None
+
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def set_control_handler(self, handler):
+        self.client.set_control_handler(handler)
+
+    def start(self, app_name, app_icon, capabilities):
+        with self.client_lock:
+            self.client.start(app_name, app_icon, capabilities)
+        with self.lock:
+            self.pending_error = None
+            self.sent.clear()
+            self.dirty = dict.fromkeys(self.desired, True)
+
+        if self.interval and self.thread is None:
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self.flush_loop, name='UpdateScheduler', daemon=True)
+            self.thread.start()
+        elif not self.interval:
+            self.flush()
+
+    def is_ready(self):
+        return self.client.is_ready()
+
+    def stop(self):
+        with self.client_lock:
+            self.client.stop()
+
+    def terminate(self, msg):
+        self.flush()
+        with self.client_lock:
+            self.client.terminate(msg)
+
+    def close(self):
+        """Stop flush thread and send everything that is still pending."""
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        self.check_error()
+        self.flush()
+        with self.client_lock:
+            if self.client.is_ready():
+                self.client.drain()
+
+    def check_error(self):
+        if self.pending_error is not None:
+            error, self.pending_error = self.pending_error, None
+            raise error
+
+    def update(self, key, method, *args):
+        self.check_error()
+        value = (method, args)
+        with self.lock:
+            self.desired[key] = value
+            if self.sent.get(key) != value:
+                self.dirty[key] = True
+            else:
+                self.dirty.pop(key, None)
+
+        if not self.interval:
+            self.flush()
+
+    def flush(self):
+        with self.client_lock:
+            if not self.client.is_ready():
+                return
+
+            with self.lock:
+                batch = [(key, self.desired[key]) for key in self.dirty]
+                self.dirty.clear()
+
+            for idx, (key, value) in enumerate(batch):
+                method, args = value
+                try:
+                    getattr(self.client, method)(*args)
+                except Exception:
+                    with self.lock:
+                        for k, _ in batch[idx:]:
+                            self.dirty[k] = True
+                    raise
+                with self.lock:
+                    self.sent[key] = value
+            if batch:
+                self.client.commit()
+
+    def flush_loop(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.pending_error = e
+
+    def clear_description_field(self, number):
+        self.update(('description', number), 'clear_description_field', number)
+
+    def set_description_field(self, number, name, value):
+        self.update(('description', number), 'set_description_field', number, name, value)
+
+    def set_dest_url(self, dest_url):
+        self.update('dest_url', 'set_dest_url', dest_url)
+
+    def set_error(self, error_code):
+        self.update('error', 'set_error', error_code)
+
+    def set_info_message(self, message):
+        self.update('info_message', 'set_info_message', message)
+
+    def set_percent(self, percent):
+        self.update('percent', 'set_percent', percent)
+
+    def set_processed_amount(self, amount, unit):
+        self.update('processed_amount', 'set_processed_amount', amount, unit)
+
+    def set_speed(self, bytes_per_second):
+        self.update('speed', 'set_speed', bytes_per_second)
+
+    def set_suspended(self, suspended):
+        self.update('suspended', 'set_suspended', suspended)
+
+    def set_total_amount(self, amount, unit):
+        self.update('total_amount', 'set_total_amount', amount, unit)
@@ -11,13 +11,75 @@ verbose = False
 notification_title = None
 notification_app_name = 'duply'
 notification_icon = 'ark'
+# see Backends.BACKENDS
+notification_backend = 'kde'
 
 save_duply_log_file_name = None
+# 'gzip', 'xz', False (plain text) or None (guess from file name)
+save_duply_log_compression = None
+# start new capture segment after this many bytes (0 - never)
+save_duply_log_max_size = 0
+# 'text', 'compact' (indexed, see CompactCapture) or None (compact for .dnc files)
+save_duply_log_format = None
+
+# how many times per second changed notification fields are sent (0 - immediately)
+update_rate = 4.0
+
+# node_exporter textfile; rewritten every prom_interval seconds (0 - only at exit)
+prom_textfile = None
+prom_interval = 0
+
+# NDJSON stream of progress/phase/volume/exit events
+events_fd = None
+events_file = None
+
+# phase timeline report: print at exit / save as JSON
+timeline = False
+timeline_json = None
 
 # log file to replay instead of running duplicity
 replay_log_file_name = None
+# None - as fast as possible
 replay_log_speed = 2.0
+# gaps between replayed lines are shortened to this many seconds (None - keep original gaps)
+replay_max_gap = 1.0
+# start replay at this many seconds from capture start or at first occurrence of phase
+replay_from_time = None
+replay_from_phase = None
+
+# sqlite history of past runs for total/ETA prediction (None - History.default_history_path())
+history = False
+history_file = None
+
+# print this many hottest directories of changed files at exit (0 - off), see HotDirs
+hot_dirs = 0
+hot_dirs_budget = 5000
+# weight files by size of size_root/path (None - count files)
+hot_dirs_size_root = None
+
+# per-command CPU and I/O from /proc shown in status, seconds between samples (0 - off)
+proc_interval = 2.0
+
+# duty-cycle throttle targets (None - no limit): disk read and upload bytes/s, CPU percent of one core
+throttle_read = None
+throttle_cpu = None
+throttle_upload = None
+throttle_period = 1.0
+
+# resident daemon socket (None - Daemon.default_socket_path()); run through daemon if it's there
+daemon_socket = None
+daemon_client = False
+
+# several backups at once: [(name, cmd)], how many run concurrently, view per backup
+multi_jobs = None
+multi_parallel = 1
+multi_child_views = False
 
 # dbus
 dbus_user = None
 dbus_env = None
+# don't wait for replies, keep up to dbus_max_in_flight calls pipelined
+dbus_async = False
+dbus_max_in_flight = 8
+# collect DBus call latency and notification lag, print summary at exit
+dbus_stats = False
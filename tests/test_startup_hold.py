@@ -0,0 +1,92 @@
+"""
+Created on Oct 18, 2026
+
+License: GPLv2+
+
+@author: dion
+"""
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from duplynotify import globals
+from duplynotify.DuplyRunner import DuplyRunner
+
+# startup record is followed by this much log, far past pipe buffer (64 KiB)
+LOG_SIZE = 4 << 20
+# way under 10 s 'Backup in progress' hold
+MAX_WRITE_TIME = 3.0
+
+# nothing is recorded or sampled for the test run
+GLOBALS = {
+    'history': False,
+    'proc_interval': 0,
+}
+
+WRITER = r'''
+import os, sys, time
+log = os.fdopen(int(sys.argv[-1]), 'wb')
+log.write(b"NOTICE 1\n. AsyncScheduler: instantiating at concurrency 0\n\n")
+log.flush()
+start = time.monotonic()
+line = b"INFO 4 'home/user/%%08d'\n\n"
+written = 0
+idx = 0
+while written < %d:
+    data = line %% idx
+    log.write(data)
+    written += len(data)
+    idx += 1
+log.flush()
+with open(sys.argv[1], 'w') as f:
+    f.write('%%f' %% (time.monotonic() - start))
+'''
+
+
+class NullJob(object):
+    """Notification that is always there and ignores everything."""
+    CAPABILITIES = 0
+    ERRORS = ()
+    USES_SESSION_BUS = False
+
+    def is_ready(self):
+        return True
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class StartupHoldTest(unittest.TestCase):
+    """Log reader keeps draining --log-fd while startup status is held."""
+
+    def setUp(self):
+        self.saved = dict((name, getattr(globals, name, None)) for name in GLOBALS)
+        for name, value in GLOBALS.items():
+            setattr(globals, name, value)
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(globals, name, value)
+
+    def test_log_writes_dont_wait(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            result_file = os.path.join(tmp_dir, 'write_time')
+            runner = DuplyRunner([sys.executable, '-c', WRITER % LOG_SIZE, result_file], 'test', 'test')
+            runner.job = NullJob()
+            start = time.monotonic()
+            res = runner.run()
+            run_time = time.monotonic() - start
+            with open(result_file) as f:
+                write_time = float(f.read())
+
+        self.assertEqual(res, 0)
+        self.assertTrue(runner.is_estimate_done)
+        self.assertLess(write_time, MAX_WRITE_TIME)
+        # nothing waited for the hold to expire
+        self.assertLess(run_time, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()